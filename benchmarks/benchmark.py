@@ -0,0 +1,216 @@
+'''Benchmarks for ffpp.
+
+Runs against local emulators from ffpp.Emulator and prints the results
+as JSON, compare the output of two versions to catch regressions.
+
+    python benchmarks/benchmark.py --sizes 10 100 1000 --output bench.json
+'''
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import struct
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ffpp.Emulator import PrinterEmulator  # noqa: E402
+from ffpp.Fleet import Fleet  # noqa: E402
+from ffpp.Network import Network  # noqa: E402
+from ffpp.Printer import Printer  # noqa: E402
+
+LOOPBACK = struct.unpack('>I', socket.inet_aton('127.0.0.1'))[0]
+
+# Recorded responses.
+STATUS = (
+    'CMD M119 Received.\r\n'
+    'Endstop: X-max:0 Y-max:0 Z-max:0\r\n'
+    'MachineStatus: BUILDING_FROM_SD\r\n'
+    'MoveMode: MOVING\r\n'
+    'Status: S:1 L:0 J:0 F:0\r\n'
+    'LED: 1\r\n'
+    'CurrentFile: RussianDollMazeModels.gx\r\n'
+    'ok\r\n'
+)
+TEMPERATURE = (
+    'CMD M105 Received.\r\nT0:104.5/225.0 T1:0.0/0.0 B:51.3/50.0\r\nok\r\n'
+)
+PROGRESS = (
+    'CMD M27 Received.\r\nSD printing byte 11/100\r\nLayer: 44/419\r\nok\r\n'
+)
+INFO = (
+    'CMD M115 Received.\r\n'
+    'Machine Type: Flashforge Adventurer 4\r\n'
+    'Machine Name: Adventurer4\r\n'
+    'Firmware: v2.0.9\r\n'
+    'SN: SNADVA9501174\r\n'
+    'X: 220 Y: 200 Z: 250\r\n'
+    'Tool Count: 1\r\n'
+    'Mac Address:88:A9:A7:93:86:F8\n \r\n'
+    'ok\r\n'
+)
+
+
+def summary(samples):
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "mean": statistics.mean(samples),
+        "median": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "min": samples[0],
+        "max": samples[-1],
+    }
+
+
+async def bench_update_phases(rounds):
+    """Latency of connect, each command and parsing, in seconds."""
+    phases = {
+        "connect": [], "M119": [], "M105": [], "M27": [],
+        "parse": [], "update": [],
+    }
+    async with PrinterEmulator() as emulator:
+        printer = Printer(emulator.host, emulator.port)
+        await printer.connect()
+        net = Network(emulator.host, emulator.port)
+        for _ in range(rounds):
+            start = time.perf_counter()
+            await net.connect()
+            phases["connect"].append(time.perf_counter() - start)
+
+            responses = []
+            for name, send in (
+                ("M119", net.sendStatusRequest),
+                ("M105", net.sendTempRequest),
+                ("M27", net.sendProgressRequest),
+            ):
+                start = time.perf_counter()
+                responses.append(await send(disconnect=False))
+                phases[name].append(time.perf_counter() - start)
+            await net.disconnect()
+
+            start = time.perf_counter()
+            printer._parseStatus(responses[0])
+            printer._parseTemperature(responses[1])
+            printer._parseProgress(responses[2])
+            phases["parse"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await printer.update()
+            phases["update"].append(time.perf_counter() - start)
+
+    return {name: summary(samples) for name, samples in phases.items()}
+
+
+def bench_parse(iterations):
+    """Parsed responses per second on recorded responses.
+
+    The responses are bytes, as Printer.update() gets them.
+    """
+    printer = Printer('127.0.0.1')
+    results = {}
+    for name, parse, response in (
+        ("info", printer._parseMachineInfo, INFO),
+        ("status", printer._parseStatus, STATUS),
+        ("temperature", printer._parseTemperature, TEMPERATURE),
+        ("progress", printer._parseProgress, PROGRESS),
+    ):
+        start = time.perf_counter()
+        response = response.encode()
+        for _ in range(iterations):
+            parse(response)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "iterations": iterations,
+            "seconds": elapsed,
+            "per_second": iterations / elapsed,
+        }
+    return results
+
+
+async def bench_fleet(sizes, concurrency):
+    """Sweep time and memory for fleets against one local server.
+
+    The server listens on all addresses, every printer gets its own
+    loopback address so the fleet sees them as different printers.
+    """
+    results = {}
+    # Room for every concurrent connect, dropped ones cost a second.
+    emulator = await PrinterEmulator().start(
+        '0.0.0.0', 0, backlog=max(100, concurrency))
+    try:
+        for size in sizes:
+            start = time.perf_counter()
+            fleet = Fleet(concurrency=concurrency, deadline=30)
+            for i in range(size):
+                ip = socket.inet_ntoa(struct.pack('>I', LOOPBACK + i))
+                fleet.addPrinter(ip, emulator.port)
+            construct = time.perf_counter() - start
+            first = await fleet.update()
+            second = await fleet.update()
+
+            # Memory of a new fleet after one sweep, traced separately
+            # as tracing slows down the timed sweeps.
+            del fleet
+            tracemalloc.start()
+            fleet = Fleet(concurrency=concurrency, deadline=30)
+            for i in range(size):
+                ip = socket.inet_ntoa(struct.pack('>I', LOOPBACK + i))
+                fleet.addPrinter(ip, emulator.port)
+            await fleet.update()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del fleet
+            results[str(size)] = {
+                "construct_seconds": construct,
+                "first_sweep_seconds": first.duration,
+                "sweep_seconds": second.duration,
+                "updated": second.updated,
+                "failed": second.failed + second.timed_out,
+                "memory_bytes": current,
+                "memory_peak_bytes": peak,
+                "memory_per_printer_bytes": current / size,
+            }
+    finally:
+        await emulator.close()
+    return results
+
+
+async def main(args):
+    result = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.time(),
+        "update_phases": await bench_update_phases(args.rounds),
+        "parse": bench_parse(args.iterations),
+        "fleet": await bench_fleet(args.sizes, args.concurrency),
+    }
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000],
+        help="Fleet sizes to sweep.")
+    parser.add_argument(
+        "--concurrency", type=int, default=256,
+        help="Fleet concurrency limit.")
+    parser.add_argument(
+        "--rounds", type=int, default=50,
+        help="Update latency samples.")
+    parser.add_argument(
+        "--iterations", type=int, default=20000,
+        help="Parse iterations per response.")
+    parser.add_argument("--output", help="Write JSON here, default stdout.")
+    asyncio.run(main(parser.parse_args()))
@@ -3,7 +3,7 @@ import logging
 
 
 from ffpp.Printer import Printer
-from ffpp.Discovery import getPrinters
+from ffpp.Discovery import iterPrinters
 
 
 # Activate module logger to output.
@@ -26,11 +26,9 @@ async def main():
     print("press ctrl+c to exit.")
     print("")
     ip = None
-    loop = asyncio.get_running_loop()
-    printers = await getPrinters(loop, limit=1)
-    for name, host in printers:
+    # Use the first printer that answers.
+    async for name, host in iterPrinters(expected=1, deadline=15):
         ip = host
-        break
 
     if ip is None:
         print("Enter your printer ip:")
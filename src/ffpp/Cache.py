@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import typing
+
+LOG = logging.getLogger(__name__)
+
+# Addresses kept per printer, newest first.
+MAX_IPS = 4
+
+
+class MachineInfoCache(object):
+    """ On disk cache of the M115 machine info of printers.
+
+    Machine info rarely changes, a printer found here connects without
+    asking for it. Entries are keyed by serial number, or MAC address
+    when there is none, and remember the last addresses of the printer
+    so it can be found again after a DHCP change.
+
+    Printers save it with saveLater(), a whole fleet connecting writes
+    the file once. flush() before exit to keep the last changes.
+
+    Example:
+        cache = MachineInfoCache("~/.ffpp/machines.json")
+        myPrinter = Printer(ip, cache=cache)
+        await myPrinter.connect()
+        ...
+        cache.ips(myPrinter.serial)  # ['192.168.50.64', ...]
+        cache.flush()
+    """
+
+    def __init__(self, path: str, save_delay: float = 1):
+        self.path = os.path.expanduser(path)
+        self.save_delay = save_delay
+        self._entries: typing.Dict[str, dict] = {}
+        # Loop and timer of a saveLater() waiting to save.
+        self._pending: typing.Optional[
+            typing.Tuple[asyncio.AbstractEventLoop, asyncio.TimerHandle]
+        ] = None
+        self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def load(self):
+        """Read the file, a missing or broken file is an empty cache."""
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            entries = {}
+        except (OSError, ValueError) as e:
+            LOG.warning("Unable to read cache %s: %s", self.path, e)
+            entries = {}
+        self._entries = entries if isinstance(entries, dict) else {}
+
+    def save(self):
+        """Write the file, replaced at once so readers never see half."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp = f"{self.path}.tmp"
+        with open(temp, 'w') as f:
+            json.dump(self._entries, f, indent=1, sort_keys=True)
+        os.replace(temp, self.path)
+
+    def saveLater(self):
+        """Save after save_delay seconds, with all changes until then.
+
+        Saves at once when no event loop is running.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._pending is not None:
+            if self._pending[0] is loop:
+                return
+            # Its loop stopped or closed, the timer may never fire.
+            self.flush()
+            return
+        if loop is None:
+            self._savePending()
+            return
+        self._pending = (
+            loop, loop.call_later(self.save_delay, self._savePending))
+
+    def flush(self):
+        """Save now if a saveLater() is waiting."""
+        if self._pending is not None:
+            self._pending[1].cancel()
+            self._savePending()
+
+    def _savePending(self):
+        self._pending = None
+        try:
+            self.save()
+        except OSError as e:
+            LOG.warning("Unable to save cache %s: %s", self.path, e)
+
+    def get(self, key: str) -> typing.Optional[dict]:
+        """Machine info of serial number or MAC address key."""
+        entry = self._entries.get(key)
+        return dict(entry["info"]) if entry else None
+
+    def find(
+        self,
+        serial: str = None,
+        mac: str = None,
+        ip: str = None
+    ) -> typing.Optional[dict]:
+        """Machine info by serial, MAC or the newest address.
+
+        Returns:
+            [dict]: Fields by name, None if the printer is unknown.
+        """
+        if serial and serial in self._entries:
+            return self.get(serial)
+
+        newest = None
+        for entry in self._entries.values():
+            info = entry["info"]
+            if mac and info.get("mac_address") == mac:
+                return dict(info)
+            if ip and entry["ips"][:1] == [ip] and (
+                newest is None or entry["updated"] > newest["updated"]
+            ):
+                newest = entry
+        return dict(newest["info"]) if newest is not None else None
+
+    def ips(self, key: str) -> typing.List[str]:
+        """Last known addresses of a printer, newest first."""
+        entry = self._entries.get(key)
+        return list(entry["ips"]) if entry else []
+
+    def store(self, info: dict, ip: str = None) -> bool:
+        """Add or update the machine info of a printer seen at ip.
+
+        Args:
+            info (dict): Fields by name, with serial or mac_address.
+            ip (str, optional): Address the printer answered on.
+
+        Returns:
+            [bool]: True if anything changed, save() to keep it.
+        """
+        key = info.get("serial") or info.get("mac_address")
+        if not key:
+            return False
+
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {"info": {}, "ips": []}
+        changed = entry["info"] != info
+        entry["info"] = dict(info)
+        if ip and entry["ips"][:1] != [ip]:
+            ips = [ip] + [i for i in entry["ips"] if i != ip]
+            entry["ips"] = ips[:MAX_IPS]
+            changed = True
+        if changed:
+            entry["updated"] = time.time()
+        return changed
+
+    def remove(self, key: str):
+        self._entries.pop(key, None)
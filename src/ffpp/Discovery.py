@@ -1,24 +1,129 @@
 import asyncio
+import ipaddress
+import re
 import socket
 import struct
 import logging
+import time
+import typing
+
+from .Network import Network
 
 LOG = logging.getLogger(__name__)
 
 
+MESSAGE = "Hello World!"
+
+# Reply of newer firmware, big endian:
+#   0    name, 132 bytes null padded
+#   132  command port, uint16
+#   134  vendor id, product id, product type, event port, status, uint16
+#   144  serial number, 130 bytes null padded
+_NAME_SIZE = 132
+_PORT_OFFSET = 132
+_SERIAL_OFFSET = 144
+_REPLY_SIZE = 274
+
+_textRegex = re.compile(rb'[\x20-\x7e]{4,}')
+_serialRegex = re.compile(r'^(?:SN)?[A-Z0-9]{8,}$')
+
+
+class DiscoveredPrinter(tuple):
+    """ A printer that answered discovery, (name, ip) with extras.
+
+    Unpacks and compares like the (name, ip) tuple, the rest of the
+    reply is kept in attributes, None when the reply had no such field.
+
+    Attributes:
+        serial (str): Serial number.
+        port (int): TCP command port.
+        model (str): Machine type.
+        raw (bytes): The whole reply.
+    """
+
+    def __new__(
+        cls,
+        name: str,
+        ip: str,
+        serial: str = None,
+        port: int = None,
+        model: str = None,
+        raw: bytes = b''
+    ):
+        self = super().__new__(cls, (name, ip))
+        self.serial = serial
+        self.port = port
+        self.model = model
+        self.raw = raw
+        return self
+
+    @property
+    def name(self) -> str:
+        return self[0]
+
+    @property
+    def ip(self) -> str:
+        return self[1]
+
+    def __repr__(self):
+        return (
+            f"DiscoveredPrinter(name={self.name!r}, ip={self.ip!r}, "
+            f"serial={self.serial!r}, port={self.port!r}, "
+            f"model={self.model!r})"
+        )
+
+
+def parseReply(data: bytes, ip: str) -> DiscoveredPrinter:
+    """Decode a discovery reply.
+
+    Replies of the documented length are read by their layout, see
+    above. Older firmware sends only the name, other lengths are
+    searched for text after the name, a serial looking string is
+    taken as serial and the first other one as model.
+
+    Args:
+        data (bytes): Datagram payload.
+        ip (str): Address it came from.
+
+    Returns:
+        [DiscoveredPrinter]: The printer.
+    """
+    def text(b: bytes) -> str:
+        return b.split(b'\x00', 1)[0].decode('utf-8', 'ignore').strip()
+
+    name = text(data)
+    serial = port = model = None
+    if len(data) >= _REPLY_SIZE:
+        port = struct.unpack_from('>H', data, _PORT_OFFSET)[0] or None
+        serial = text(data[_SERIAL_OFFSET:_REPLY_SIZE]) or None
+    else:
+        end = data.find(b'\x00')
+        for match in _textRegex.finditer(data, end if end >= 0 else len(data)):
+            value = match.group().decode().strip()
+            if serial is None and _serialRegex.match(value):
+                serial = value
+            elif model is None and value:
+                model = value
+    return DiscoveredPrinter(name, ip, serial, port, model, bytes(data))
+
+
 class ffDiscoveryDatagramProtocol(asyncio.DatagramProtocol):
     def __init__(
         self,
         message: str,
         on_con_lost: asyncio.Future,
         interface_addr: str,
-        limit: int
+        limit: int,
+        on_printer: typing.Callable[[DiscoveredPrinter], None] = None,
+        auto_probe: bool = True
     ):
         self.message = message
         self.on_con_lost = on_con_lost
         self.transport = None
         self.interface_addr = interface_addr
         self.limit = limit
+        self.on_printer = on_printer
+        self.auto_probe = auto_probe
         self.data = []
         self.received = 0
 
@@ -33,19 +138,24 @@ class ffDiscoveryDatagramProtocol(asyncio.DatagramProtocol):
             socket.IP_MULTICAST_IF,
             socket.inet_aton(self.interface_addr)
         )
+        if self.auto_probe:
+            self.probe()
+
+    def probe(self):
+        """ Send the discovery message, printers answer to it."""
         # print('Send:', self.message)
         self.transport.sendto(self.message.encode(), ("225.0.0.9", 19000))
 
     def datagram_received(self, data: bytes, addr):
         self.received += 1
         try:
-            end = data.find(b'\x00')
-            name = data[:end].decode('utf-8', "ignore")
-            ip = addr[0]
+            printer = parseReply(data, addr[0])
         except Exception:
             return
 
-        self.data.append((name, ip))
+        self.data.append(printer)
+        if self.on_printer is not None:
+            self.on_printer(printer)
 
         if self.received == self.limit:
             self.transport.close()
@@ -61,6 +171,63 @@ class ffDiscoveryDatagramProtocol(asyncio.DatagramProtocol):
             pass
 
 
+class _DiscoveryEndpoint(object):
+    """ One discovery socket per interface, shared by concurrent scans.
+
+    Every scan adds a listener and sends its own probe, the replies
+    go to all listeners. The socket is closed with its last user.
+    """
+    _endpoints: typing.Dict[typing.Tuple[str, int], "_DiscoveryEndpoint"] = {}
+
+    def __init__(self, host_ip: str, port: int):
+        self.host_ip = host_ip
+        self.port = port
+        self.users = 0
+        self.listeners: typing.List[typing.Callable] = []
+        self.transport = None
+        self.protocol: typing.Optional[ffDiscoveryDatagramProtocol] = None
+        self._opening: typing.Optional[asyncio.Future] = None
+
+    @classmethod
+    async def acquire(cls, loop, host_ip: str, port: int = 0):
+        key = (host_ip, port)
+        endpoint = cls._endpoints.get(key)
+        if endpoint is None:
+            endpoint = cls(host_ip, port)
+            cls._endpoints[key] = endpoint
+            endpoint._opening = loop.create_task(endpoint._open(loop))
+        endpoint.users += 1
+        try:
+            await asyncio.shield(endpoint._opening)
+        except BaseException:
+            endpoint.release()
+            raise
+        return endpoint
+
+    def release(self):
+        self.users -= 1
+        if self.users <= 0:
+            if self._endpoints.get((self.host_ip, self.port)) is self:
+                del self._endpoints[(self.host_ip, self.port)]
+            if self.transport is not None:
+                self.transport.close()
+
+    def probe(self):
+        self.protocol.probe()
+
+    async def _open(self, loop):
+        self.transport, self.protocol = await loop.create_datagram_endpoint(
+            lambda: ffDiscoveryDatagramProtocol(
+                MESSAGE, loop.create_future(), self.host_ip, None,
+                on_printer=self._dispatch, auto_probe=False),
+            local_addr=(self.host_ip, self.port)
+        )
+
+    def _dispatch(self, printer):
+        for listener in list(self.listeners):
+            listener(printer)
+
+
 def find_host_ip():
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     try:
@@ -74,45 +241,358 @@ def find_host_ip():
     return IP
 
 
-async def getPrinters(loop: asyncio.BaseEventLoop, limit: int = None, host_ip: str = None) -> tuple():
+def find_host_ips() -> typing.List[str]:
+    """ IPv4 address of every interface that is up, except loopback.
+
+    Returns:
+        [list(str)]: Interface addresses, at least find_host_ip().
+    """
+    ips = []
+    try:
+        import fcntl
+        SIOCGIFADDR = 0x8915
+        for _, name in socket.if_nameindex():
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                packed = fcntl.ioctl(
+                    s.fileno(),
+                    SIOCGIFADDR,
+                    struct.pack('256s', name[:15].encode())
+                )
+                ips.append(socket.inet_ntoa(packed[20:24]))
+            except OSError:
+                pass  # No IPv4 address.
+            finally:
+                s.close()
+    except (ImportError, AttributeError, OSError):
+        # Not Linux, ask the resolver instead.
+        try:
+            ips = socket.gethostbyname_ex(socket.gethostname())[2]
+        except OSError:
+            pass
+
+    ips = [ip for ip in ips if not ip.startswith('127.')]
+    if not ips:
+        ips = [find_host_ip()]
+    return list(dict.fromkeys(ips))
+
+
+async def getPrinters(
+    loop: asyncio.BaseEventLoop,
+    limit: int = None,
+    host_ip: str = None,
+    timeout: float = 15,
+    host_ips: typing.Iterable[str] = None,
+    local_port: int = 0
+) -> tuple():
     """Search network for connected printers.
 
     Args:
         loop (asyncio.BaseEventLoop): EventLoop
         limit ([int], optional): Stop search when limit is reached. Defaults to None.
+        host_ip (str, optional): Only search from this interface address.
+        timeout (float, optional): Max seconds to wait for replies.
+            Defaults to 15.
+        host_ips (list(str), optional): Search from these interface
+            addresses. Defaults to all interfaces.
+        local_port (int, optional): Local port, 0 for any free port.
 
     Returns:
-        [tuple(str, str)]: return a list of available printers, as (name, ip)
+        [list(DiscoveredPrinter)]: return a list of available printers,
+            as (name, ip)
     """
-    # Get a reference to the event loop as we plan to use
-    # low-level APIs.
-    # loop = asyncio.get_running_loop()
+    return [
+        printer async for printer in iterPrinters(
+            loop,
+            expected=limit,
+            deadline=timeout,
+            host_ip=host_ip,
+            host_ips=host_ips,
+            local_port=local_port
+        )
+    ]
 
-    on_con_lost = loop.create_future()
-    message = "Hello World!"
 
-    if not host_ip:
-        host_ip = find_host_ip()
+async def iterPrinters(
+    loop: asyncio.BaseEventLoop = None,
+    expected: typing.Union[int, typing.Collection[str]] = None,
+    deadline: float = 15,
+    host_ip: str = None,
+    host_ips: typing.Iterable[str] = None,
+    local_port: int = 0
+) -> typing.AsyncIterator[DiscoveredPrinter]:
+    """Search network for printers, yield each one as it answers.
 
-    transport, ffDiscovery = await loop.create_datagram_endpoint(
-        lambda: ffDiscoveryDatagramProtocol(
-            message, on_con_lost, host_ip, limit),
-        local_addr=(host_ip, 8002)
-    )
+    All interfaces are searched at the same time, each from its own
+    socket. Concurrent searches in the process share the sockets.
+
+    Example:
+        async for name, ip in iterPrinters(expected=1, deadline=5):
+            await Printer(ip).connect()
+
+    Args:
+        loop (asyncio.BaseEventLoop, optional): EventLoop
+        expected (int | collection of str, optional): Stop when this
+            many printers, or all of these names or ips, have answered.
+        deadline (float, optional): Max seconds to search. Defaults to 15.
+        host_ip (str, optional): Only search from this interface address.
+        host_ips (list(str), optional): Search from these interface
+            addresses. Defaults to all interfaces.
+        local_port (int, optional): Local port, 0 for any free port.
+
+    Yields:
+        [DiscoveredPrinter]: Printer as (name, ip), each one once.
+    """
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    if host_ip:
+        host_ips = [host_ip]
+    elif not host_ips:
+        host_ips = find_host_ips()
+
+    queue: asyncio.Queue = asyncio.Queue()
+    endpoints = []
     try:
-        # Wait until limit or timeout is reached.
-        await asyncio.wait_for(
-            on_con_lost,
-            timeout=15
-        )
-    except Exception:  # CancelError and TimeoutError
-        LOG.debug("FlashForge printer search timeout.")
-        # raise TimeoutError(e) from e
+        for ip in dict.fromkeys(host_ips):
+            try:
+                endpoint = await _DiscoveryEndpoint.acquire(
+                    loop, ip, local_port)
+            except OSError as e:
+                LOG.debug("Unable to search from %s: %s", ip, e)
+                continue
+            endpoints.append(endpoint)
+            endpoint.listeners.append(queue.put_nowait)
+            endpoint.probe()
+
+        missing = None
+        if expected is not None and not isinstance(expected, int):
+            missing = set(expected)
+
+        end = loop.time() + deadline
+        seen = set()
+        while endpoints:
+            remaining = end - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                printer = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                LOG.debug("FlashForge printer search deadline.")
+                break
+            name, ip = printer
+            if ip in seen:
+                continue
+            seen.add(ip)
+            LOG.debug("Printer online: %s - %s", name, ip)
+            yield printer
+
+            if missing is not None:
+                missing.difference_update((name, ip))
+                if not missing:
+                    break
+            elif expected is not None and len(seen) >= expected:
+                break
+    finally:
+        for endpoint in endpoints:
+            endpoint.listeners.remove(queue.put_nowait)
+            endpoint.release()
+
+
+async def sweepPrinters(
+    network: str,
+    port: int = 8899,
+    concurrency: int = 256,
+    timeout: float = 0.5,
+    confirm_timeout: float = 3
+) -> typing.List[DiscoveredPrinter]:
+    """Search a subnet for printers over TCP, when multicast is blocked.
+
+    Every address is tried on port with a short connect timeout, a host
+    that accepts is confirmed with M115 and named by its Machine Name.
+
+    Example:
+        printers = await sweepPrinters('192.168.8.0/22')
+
+    Args:
+        network (str): Subnet like '192.168.8.0/22'.
+        port (int, optional): Printer port. Defaults to 8899.
+        concurrency (int, optional): Hosts tried at the same time.
+        timeout (float, optional): Connect timeout per host.
+        confirm_timeout (float, optional): Timeout for the M115 exchange.
+
+    Returns:
+        [list(DiscoveredPrinter)]: Printers as (name, ip), in address
+            order, with serial and model from M115.
+    """
+    hosts = iter(ipaddress.ip_network(network, strict=False).hosts())
+    found = {}
+
+    async def worker():
+        for host in hosts:
+            ip = str(host)
+            printer = await _confirmPrinter(
+                ip, port, timeout, confirm_timeout)
+            if printer is not None:
+                LOG.debug("Printer online: %s - %s", printer.name, ip)
+                found[host] = printer
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return [found[host] for host in sorted(found)]
+
+
+_machine_name = re.compile(r"Machine Name\s?:\s?(.*?)\r\n")
+_machine_type = re.compile(r"Machine Type\s?:\s?(.*?)\r\n")
+_machine_SN = re.compile(r"SN\s?:\s?(.*?)\r\n")
+
+
+async def _confirmPrinter(ip, port, timeout, confirm_timeout):
+    # The printer at ip, None if there is none.
+    network = Network(
+        ip, port, connect_timeout=timeout, exchange_timeout=confirm_timeout)
+    try:
+        response = await network.sendInfoRequest()
+    except (OSError, asyncio.TimeoutError, TimeoutError):
+        return None
     finally:
-        transport.close()
+        await network.disconnect()
+    if "CMD M115 Received" not in response:
+        return None
 
-    printers = ffDiscovery.data
-    for printer in printers:
-        LOG.debug("Printer online: %s - %s", printer[0], printer[1])
+    def search(regex):
+        re_result = regex.search(response)
+        return re_result.group(1) if re_result else None
+
+    return DiscoveredPrinter(
+        search(_machine_name) or "",
+        ip,
+        serial=search(_machine_SN),
+        port=port,
+        model=search(_machine_type),
+        raw=response.encode()
+    )
+
+
+class DiscoveryService(object):
+    """ Keep searching for printers in the background.
+
+    Probes the network every interval seconds and keeps the printers
+    that answered. A printer not seen for ttl seconds is dropped.
+    Reading printers never blocks.
+
+    Example:
+        service = DiscoveryService(
+            on_appeared=lambda name, ip: print("Found", name, ip))
+        await service.start()
+        ...
+        for name, ip in service.printers:
+            ...
+        await service.stop()
+    """
+
+    def __init__(
+        self,
+        interval: float = 30,
+        ttl: float = 95,
+        probe_timeout: float = 3,
+        host_ip: str = None,
+        on_appeared: typing.Callable[[str, str], typing.Any] = None,
+        on_disappeared: typing.Callable[[str, str], typing.Any] = None
+    ):
+        self.interval = interval
+        self.ttl = ttl
+        self.probe_timeout = probe_timeout
+        self.host_ip = host_ip
+        self.on_appeared = on_appeared
+        self.on_disappeared = on_disappeared
+        # ip -> (printer, last seen)
+        self._seen: typing.Dict[
+            str, typing.Tuple[DiscoveredPrinter, float]] = {}
+        self._task: typing.Optional[asyncio.Task] = None
+        self._first = None
+
+    @property
+    def printers(self) -> typing.List[DiscoveredPrinter]:
+        """Printers seen within ttl, as (name, ip)."""
+        return [printer for printer, _ in self._seen.values()]
+
+    def lastSeen(self, ip: str) -> typing.Optional[float]:
+        """time.time() when ip last answered."""
+        seen = self._seen.get(ip)
+        return seen[1] if seen else None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Start probing in the background, returns at once."""
+        if not self.running:
+            loop = asyncio.get_running_loop()
+            self._first = loop.create_future()
+            self._task = loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def wait(self):
+        """Wait until the first probe is done."""
+        if self._first is not None:
+            await asyncio.shield(self._first)
+
+    async def probe(self):
+        """Probe once and update the cache."""
+        printers = await getPrinters(
+            asyncio.get_running_loop(),
+            host_ip=self.host_ip,
+            timeout=self.probe_timeout
+        )
+        self.seen(printers)
+        self.expire()
+
+    def seen(self, printers: typing.Iterable[typing.Tuple[str, str]]):
+        """Add printers to the cache as seen now."""
+        now = time.time()
+        for printer in printers:
+            name, ip = printer
+            if not isinstance(printer, DiscoveredPrinter):
+                printer = DiscoveredPrinter(name, ip)
+            new = ip not in self._seen
+            self._seen[ip] = (printer, now)
+            if new:
+                LOG.debug("Printer appeared: %s - %s", name, ip)
+                self._callback(self.on_appeared, name, ip)
+
+    def expire(self):
+        """Drop printers not seen within ttl."""
+        limit = time.time() - self.ttl
+        for ip, (printer, last_seen) in list(self._seen.items()):
+            if last_seen < limit:
+                del self._seen[ip]
+                LOG.debug("Printer disappeared: %s - %s", printer.name, ip)
+                self._callback(self.on_disappeared, printer.name, ip)
+
+    def _callback(self, callback, name, ip):
+        if callback is None:
+            return
+        try:
+            result = callback(name, ip)
+            if asyncio.iscoroutine(result):
+                asyncio.ensure_future(result)
+        except Exception:
+            LOG.exception("Discovery callback failed.")
 
-    return printers
+    async def _run(self):
+        while True:
+            try:
+                await self.probe()
+            except OSError as e:
+                LOG.debug("Discovery probe failed: %s", e)
+            if not self._first.done():
+                self._first.set_result(True)
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,410 @@
+'''Local emulator of a FlashForge printer.
+
+Serves the TCP protocol used by Network on port 8899 and answers the
+discovery probe sent by Discovery.getPrinters(). Meant for tests and
+load tests, many emulators can run in one process.
+
+Example:
+    emulator = PrinterEmulator(name="Adventurer4")
+    await emulator.start('127.0.0.1', 0)
+    myPrinter = Printer(emulator.host, emulator.port)
+'''
+import asyncio
+import logging
+import socket
+import struct
+import time
+import typing
+
+LOG = logging.getLogger(__name__)
+
+
+class PrinterEmulator(object):
+    """ One emulated printer, its state and its tcp server."""
+
+    def __init__(
+        self,
+        name: str = "Adventurer4",
+        serial: str = "SNADVA9501174",
+        mac: str = "88:A9:A7:93:86:F8",
+        machine_type: str = "Flashforge Adventurer 4",
+        firmware: str = "v2.0.9",
+        files: typing.List[str] = None,
+        print_time: float = 600,
+        layers: int = 419,
+    ):
+        self.name = name
+        self.serial = serial
+        self.mac = mac
+        self.machine_type = machine_type
+        self.firmware = firmware
+        self.files = files if files is not None else ["My Box.gx"]
+        self.print_time = print_time
+        self.layers = layers
+
+        self.host = None
+        self.port = None
+        self.machine_status = "READY"
+        self.move_mode = "READY"
+        self.led = 0
+        self.current_file = ""
+        self.progress = 0.0
+        self.extruder = [22.0, 0.0]
+        self.bed = [14.0, 0.0]
+        self.position = [0.0, 0.0, 0.0]
+
+        self.connections = 0
+        self.commands = 0
+        self._controller = None
+        self._server: typing.Optional[asyncio.AbstractServer] = None
+        self._clients = set()
+        self._updated = time.monotonic()
+
+    async def start(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 8899,
+        backlog: int = 100
+    ):
+        """Start serving, port 0 picks a free port.
+
+        Connections beyond backlog waiting to be accepted are dropped
+        by the kernel and retried a second later, raise it when many
+        clients connect at once.
+        """
+        self._server = await asyncio.start_server(
+            self._handle, host, port, backlog=backlog)
+        self.host, self.port = self._server.sockets[0].getsockname()[:2]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._clients):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        if self._server is None:
+            await self.start('127.0.0.1', 0)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def discoveryReply(self) -> bytes:
+        """Payload sent back to a discovery probe.
+
+        Laid out like newer firmware: name, command port and serial,
+        older firmware sends only the name padded to 128 bytes.
+        """
+        return (
+            self.name.encode()[:131].ljust(132, b'\x00')
+            + struct.pack('>6H', self.port or 8899, 0x2b, 0x1, 0, 0, 0)
+            + self.serial.encode()[:129].ljust(130, b'\x00')
+        )
+
+    def respond(self, message: bytes, client=None) -> bytes:
+        """Build the response to one command line like b'~M119\\r\\n'.
+
+        Args:
+            message (bytes): Command line.
+            client (object, optional): Identifies the connection that
+                holds control.
+
+        Returns:
+            [bytes]: Complete response.
+        """
+        self.commands += 1
+        self._advance()
+
+        words = message.strip().lstrip(b'~').split(b' ', 1)
+        code = words[0].decode('utf8', 'ignore').upper()
+        args = words[1].decode('utf8', 'ignore') if len(words) > 1 else ""
+
+        handler = getattr(self, '_' + code, None)
+        body = handler(args, client) if handler else ""
+        if code == 'M26':
+            # Only the header, like the printer.
+            return f'CMD {code} Received.\r\n'.encode()
+        response = f'CMD {code} Received.\r\n{body}ok\r\n'.encode()
+        if code == 'M661':
+            response += self._fileList()
+        return response
+
+    def _M115(self, args, client):
+        return (
+            f'Machine Type: {self.machine_type}\r\n'
+            f'Machine Name: {self.name}\r\n'
+            f'Firmware: {self.firmware}\r\n'
+            f'SN: {self.serial}\r\n'
+            'X: 220 Y: 200 Z: 250\r\n'
+            'Tool Count: 1\r\n'
+            f'Mac Address:{self.mac}\n \r\n'
+        )
+
+    def _M119(self, args, client):
+        return (
+            'Endstop: X-max:0 Y-max:0 Z-max:0\r\n'
+            f'MachineStatus: {self.machine_status}\r\n'
+            f'MoveMode: {self.move_mode}\r\n'
+            'Status: S:1 L:0 J:0 F:0\r\n'
+            f'LED: {self.led}\r\n'
+            f'CurrentFile: {self.current_file}\r\n'
+        )
+
+    def _M105(self, args, client):
+        return (
+            f'T0:{self.extruder[0]:.1f}/{self.extruder[1]:.1f} '
+            f'B:{self.bed[0]:.1f}/{self.bed[1]:.1f}\r\n'
+        )
+
+    def _M27(self, args, client):
+        percent = int(self.progress * 100)
+        body = f'SD printing byte {percent}/100\r\n'
+        if self.current_file:
+            layer = int(self.progress * self.layers)
+            body += f'Layer: {layer}/{self.layers}\r\n'
+        return body
+
+    def _M114(self, args, client):
+        x, y, z = self.position
+        return f'X:{x:g} Y:{y:g} Z:{z:g} A:0 B:0\r\n'
+
+    def _M601(self, args, client):
+        if self._controller not in (None, client):
+            return 'Control failed.\r\n'
+        self._controller = client
+        return 'Control Success V2.1.\r\n'
+
+    def _M602(self, args, client):
+        if self._controller == client:
+            self._controller = None
+        return ''
+
+    def _M104(self, args, client):
+        for arg in args.split():
+            if arg[:1].upper() == 'S':
+                self.extruder[1] = float(arg[1:])
+        return ''
+
+    def _M140(self, args, client):
+        for arg in args.split():
+            if arg[:1].upper() == 'S':
+                self.bed[1] = float(arg[1:])
+        return ''
+
+    def _M146(self, args, client):
+        for arg in args.split():
+            if arg[:1].lower() == 'r':
+                self.led = 1 if int(arg[1:]) > 0 else 0
+        return ''
+
+    def _M23(self, args, client):
+        name = args.split('/')[-1].strip()
+        if name not in self.files:
+            return f'File not found: {name}\r\n'
+        self.current_file = name
+        self.progress = 0.0
+        self.machine_status = "BUILDING_FROM_SD"
+        self.move_mode = "MOVING"
+        self.extruder[1] = 210.0
+        self.bed[1] = 60.0
+        return f'File opened: {name} Size: 1613086\r\nFile selected\r\n'
+
+    def _M24(self, args, client):
+        if self.current_file:
+            self.machine_status = "BUILDING_FROM_SD"
+            self.move_mode = "MOVING"
+        return ''
+
+    def _M25(self, args, client):
+        if self.current_file:
+            self.machine_status = "PAUSED"
+            self.move_mode = "PAUSED"
+        return ''
+
+    def _M26(self, args, client):
+        self._finish()
+        return ''
+
+    def _fileList(self) -> bytes:
+        data = b'D\xaa\xaa\x00' + struct.pack('>I', len(self.files))
+        for name in self.files:
+            name = f'/data/{name}'.encode()
+            data += b'::\xa3\xa3' + struct.pack('>I', len(name)) + name
+        return data
+
+    def _finish(self):
+        self.machine_status = "READY"
+        self.move_mode = "READY"
+        self.current_file = ""
+        self.extruder[1] = 0.0
+        self.bed[1] = 0.0
+
+    def _advance(self):
+        # Move the simulation forward to now.
+        now = time.monotonic()
+        dt, self._updated = now - self._updated, now
+
+        for temp in (self.extruder, self.bed):
+            step = (5.0 if temp[1] > temp[0] else 2.0) * dt
+            if abs(temp[1] - temp[0]) <= step:
+                temp[0] = temp[1] if temp[1] > 0 else max(22.0, temp[0])
+            else:
+                temp[0] += step if temp[1] > temp[0] else -step
+            temp[0] = max(temp[0], 14.0)
+
+        heated = self.extruder[0] >= self.extruder[1] - 2
+        if self.machine_status == "BUILDING_FROM_SD" and heated:
+            self.progress = min(1.0, self.progress + dt / self.print_time)
+            self.position[2] = round(self.progress * 250, 2)
+            if self.progress >= 1.0:
+                self._finish()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._clients.add(writer)
+        client = object()
+        try:
+            while True:
+                try:
+                    message = await reader.readuntil(b'\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                writer.write(self.respond(message, client))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if self._controller is client:
+                self._controller = None
+            self._clients.discard(writer)
+            writer.close()
+
+
+class DiscoveryResponder(asyncio.DatagramProtocol):
+    """ Answer discovery probes for a set of emulators.
+
+    Each emulator answers from its own host address, so a farm bound
+    to different loopback addresses is found as different printers.
+    """
+
+    def __init__(self, emulators: typing.Iterable[PrinterEmulator]):
+        self.emulators = list(emulators)
+        self.transport = None
+        self._sockets: typing.Dict[str, socket.socket] = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr):
+        for emulator in self.emulators:
+            self._socket(emulator.host).sendto(emulator.discoveryReply(), addr)
+
+    def connection_lost(self, exc):
+        for sock in self._sockets.values():
+            sock.close()
+        self._sockets.clear()
+
+    def _socket(self, host: str) -> socket.socket:
+        sock = self._sockets.get(host)
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            sock.bind((host or '127.0.0.1', 0))
+            self._sockets[host] = sock
+        return sock
+
+
+async def startDiscoveryResponder(
+    emulators: typing.Iterable[PrinterEmulator],
+    host: str = '0.0.0.0',
+    port: int = 19000,
+    group: str = '225.0.0.9',
+    interface: str = '127.0.0.1'
+) -> typing.Tuple[asyncio.DatagramTransport, DiscoveryResponder]:
+    """Listen for discovery probes, on the multicast group if possible.
+
+    Returns:
+        [tuple(DatagramTransport, DiscoveryResponder)]: Close the
+        transport to stop answering.
+    """
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    if group:
+        try:
+            sock.setsockopt(
+                socket.IPPROTO_IP,
+                socket.IP_ADD_MEMBERSHIP,
+                socket.inet_aton(group) + socket.inet_aton(interface)
+            )
+        except OSError as e:
+            LOG.debug("Unable to join multicast group %s: %s", group, e)
+    return await loop.create_datagram_endpoint(
+        lambda: DiscoveryResponder(emulators), sock=sock)
+
+
+class EmulatorFarm(object):
+    """ Many emulated printers in one process.
+
+    With distinct_ips each emulator binds its own loopback address
+    from host upwards (127.0.0.2, 127.0.0.3, ...) on the same port,
+    which works on Linux. Otherwise all share host on free ports.
+
+    Example:
+        async with EmulatorFarm(300) as farm:
+            for emulator in farm:
+                fleet.addPrinter(emulator.host, emulator.port)
+    """
+
+    def __init__(
+        self,
+        count: int,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        distinct_ips: bool = False,
+        **kwargs
+    ):
+        self.count = count
+        self.host = host
+        self.port = port
+        self.distinct_ips = distinct_ips
+        self.kwargs = kwargs
+        self.emulators: typing.List[PrinterEmulator] = []
+
+    def __iter__(self):
+        return iter(self.emulators)
+
+    def __len__(self):
+        return len(self.emulators)
+
+    async def start(self):
+        base = struct.unpack('>I', socket.inet_aton(self.host))[0]
+        for i in range(self.count):
+            host = self.host
+            if self.distinct_ips:
+                host = socket.inet_ntoa(struct.pack('>I', base + i + 1))
+            emulator = PrinterEmulator(
+                name=f"Emulator{i:04d}",
+                serial=f"SNEMU{i:08d}",
+                mac="88:A9:A7:{:02X}:{:02X}:{:02X}".format(
+                    (i >> 16) & 0xFF, (i >> 8) & 0xFF, i & 0xFF),
+                **self.kwargs
+            )
+            await emulator.start(host, self.port)
+            self.emulators.append(emulator)
+        return self
+
+    async def close(self):
+        await asyncio.gather(*[e.close() for e in self.emulators])
+        self.emulators.clear()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
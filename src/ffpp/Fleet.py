@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import time
+import typing
+
+from .Network import ConnectionPool
+from .Printer import Printer, UpdateGroup
+from .Watch import COALESCE, Subscription
+
+LOG = logging.getLogger(__name__)
+
+
+class FleetStats(object):
+    """ Result of one update cycle over the fleet."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.duration = 0.0
+        self.updated = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.errors: typing.Dict[str, Exception] = {}
+
+    def __repr__(self):
+        return (
+            f"FleetStats(updated={self.updated}, failed={self.failed}, "
+            f"timed_out={self.timed_out}, duration={self.duration:.3f})"
+        )
+
+    @property
+    def total(self):
+        return self.updated + self.failed + self.timed_out
+
+
+class Fleet(object):
+    """ Update many printers concurrently.
+
+    At most concurrency printers are updated at the same time and every
+    printer has deadline seconds to finish, a printer that fails or
+    times out is recorded in the stats and does not stop the others.
+
+    Example:
+        fleet = Fleet(concurrency=50, deadline=5)
+        fleet.addPrinter('192.168.0.10')
+        fleet.addPrinter('192.168.0.11')
+        stats = await fleet.update()
+    """
+
+    def __init__(
+        self,
+        printers: typing.Iterable[Printer] = (),
+        concurrency: int = 32,
+        deadline: float = 10,
+        pool: ConnectionPool = None
+    ):
+        self.concurrency = concurrency
+        self.deadline = deadline
+        self.pool = pool
+        self.last_stats: typing.Optional[FleetStats] = None
+        self._printers: typing.Dict[str, Printer] = {}
+        self._semaphore: typing.Optional[asyncio.Semaphore] = None
+        self._subscriptions: typing.List[Subscription] = []
+        # Called with every printer added, like a PollScheduler waking up.
+        self.added_listeners: typing.List[
+            typing.Callable[[Printer], typing.Any]] = []
+        for printer in printers:
+            self.add(printer)
+
+    def __len__(self):
+        return len(self._printers)
+
+    def __iter__(self):
+        return iter(self._printers.values())
+
+    def __contains__(self, ip):
+        return ip in self._printers
+
+    def get(self, ip: str) -> typing.Optional[Printer]:
+        return self._printers.get(ip)
+
+    def add(self, printer: Printer):
+        self._printers[printer.network.ip] = printer
+        for subscription in self._subscriptions:
+            printer.subscribe(subscription)
+        for listener in list(self.added_listeners):
+            listener(printer)
+
+    def addPrinter(self, ip: str, port: int = 8899) -> Printer:
+        """Create a printer, on the fleet pool if there is one.
+
+        Returns:
+            [Printer]: The new or already known printer.
+        """
+        if ip not in self._printers:
+            self.add(Printer(ip, port, pool=self.pool))
+        return self._printers[ip]
+
+    def remove(self, ip: str) -> typing.Optional[Printer]:
+        printer = self._printers.pop(ip, None)
+        if printer is not None:
+            for subscription in self._subscriptions:
+                printer.unsubscribe(subscription)
+        return printer
+
+    async def watch(
+        self,
+        deadband: float = 1.0,
+        maxsize: int = 1000,
+        policy: str = COALESCE
+    ):
+        """Yield the changes of all printers, see Printer.watch().
+
+        The fleet must be updated elsewhere, by run() or a scheduler.
+        """
+        subscription = Subscription(deadband, maxsize, policy)
+        self._subscriptions.append(subscription)
+        for printer in self._printers.values():
+            printer.subscribe(subscription)
+        try:
+            async for change in subscription:
+                yield change
+        finally:
+            self._subscriptions.remove(subscription)
+            for printer in self._printers.values():
+                printer.unsubscribe(subscription)
+            subscription.close()
+
+    async def updatePrinter(
+        self,
+        printer: Printer,
+        stats: FleetStats = None,
+        **kwargs
+    ) -> bool:
+        """Update one printer within the concurrency limit and deadline.
+
+        Args:
+            printer (Printer): Printer to update.
+            stats (FleetStats, optional): Record the result here.
+            kwargs: Passed on to Printer.update().
+
+        Returns:
+            [bool]: True if the printer was updated.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        ip = printer.network.ip
+        async with self._semaphore:
+            try:
+                await asyncio.wait_for(
+                    printer.update(**kwargs),
+                    timeout=self.deadline
+                )
+            except (asyncio.TimeoutError, TimeoutError) as e:
+                LOG.debug("Printer %s did not answer in time.", ip)
+                network = printer.network
+                if not network.keep_alive and not network.isBusy():
+                    # A kept connection is resynced by its next request,
+                    # one in use is left to the request holding it.
+                    await network.disconnect()
+                if stats is not None:
+                    stats.timed_out += 1
+                    stats.errors[ip] = TimeoutError(e)
+                return False
+            except Exception as e:
+                LOG.debug("Printer %s update failed: %s", ip, e)
+                if stats is not None:
+                    stats.failed += 1
+                    stats.errors[ip] = e
+                return False
+
+        if stats is not None:
+            stats.updated += 1
+        return True
+
+    async def update(self, **kwargs) -> FleetStats:
+        """Update all printers once.
+
+        Returns:
+            [FleetStats]: Stats for this cycle.
+        """
+        stats = FleetStats()
+        await asyncio.gather(*[
+            self.updatePrinter(printer, stats, **kwargs)
+            for printer in list(self._printers.values())
+        ])
+        stats.duration = time.monotonic() - stats.started
+        self.last_stats = stats
+        LOG.debug("Fleet update: %s", stats)
+        return stats
+
+    async def run(
+        self,
+        interval: float = 10,
+        callback: typing.Callable[[FleetStats], typing.Any] = None,
+        intervals: typing.Dict[UpdateGroup, float] = None
+    ):
+        """Update all printers every interval seconds until cancelled.
+
+        Example:
+            await fleet.run(intervals={
+                UpdateGroup.TEMPERATURE: 1,
+                UpdateGroup.STATUS | UpdateGroup.PROGRESS: 10,
+            })
+
+        Args:
+            interval (float, optional): Seconds between cycle starts.
+            callback (callable, optional): Called with the stats of
+                every cycle, may be a coroutine function.
+            intervals (dict, optional): Seconds between refreshes of
+                each UpdateGroup, replaces interval. A cycle refreshes
+                only the groups that are due.
+        """
+        if intervals is None:
+            while True:
+                stats = await self.update()
+                await self._runCallback(callback, stats)
+                await asyncio.sleep(max(0, interval - stats.duration))
+
+        due = {group: 0.0 for group in intervals}
+        while True:
+            now = time.monotonic()
+            groups = UpdateGroup(0)
+            for group, every in intervals.items():
+                if due[group] <= now:
+                    groups |= group
+                    due[group] = now + every
+            stats = await self.update(groups=groups)
+            await self._runCallback(callback, stats)
+            await asyncio.sleep(max(0, min(due.values()) - time.monotonic()))
+
+    @staticmethod
+    async def _runCallback(callback, stats):
+        if callback is not None:
+            result = callback(stats)
+            if asyncio.iscoroutine(result):
+                await result
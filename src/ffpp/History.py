@@ -0,0 +1,166 @@
+from array import array
+import itertools
+import math
+import time
+import typing
+
+NAN = float('nan')
+
+
+class Aggregate(typing.NamedTuple):
+    """ Aggregates over a window of one channel."""
+    count: int
+    min: float
+    max: float
+    mean: float
+    slope: float  # Change per second, least squares.
+
+
+class TelemetryHistory(object):
+    """ Fixed size ring buffer of printer telemetry.
+
+    Every channel is a typed array, time as double and the rest as
+    float, a missing value is stored as NaN. 24 hours of 5 second
+    samples take about 0.5 MB.
+
+    The storage can be read without copying, for example with numpy:
+        older, newer = history.buffers('bed')
+        bed = numpy.concatenate([
+            numpy.frombuffer(older, dtype=numpy.float32),
+            numpy.frombuffer(newer, dtype=numpy.float32),
+        ])
+    """
+    CHANNELS = (
+        'time',
+        'extruder',
+        'extruder_target',
+        'bed',
+        'bed_target',
+        'percent',
+        'layer',
+    )
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._head = 0  # Next write position.
+        self._count = 0
+        self._channels: typing.Dict[str, array] = {}
+        for name in self.CHANNELS:
+            typecode = 'd' if name == 'time' else 'f'
+            self._channels[name] = array(typecode, [NAN]) * capacity
+
+    def __len__(self):
+        return self._count
+
+    def append(
+        self,
+        timestamp: float = None,
+        extruder: float = None,
+        extruder_target: float = None,
+        bed: float = None,
+        bed_target: float = None,
+        percent: float = None,
+        layer: float = None
+    ):
+        """Add a sample, overwrite the oldest one when full."""
+        if timestamp is None:
+            timestamp = time.time()
+        values = (
+            timestamp, extruder, extruder_target,
+            bed, bed_target, percent, layer
+        )
+        head = self._head
+        for name, value in zip(self.CHANNELS, values):
+            self._channels[name][head] = NAN if value is None else value
+        self._head = (head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    def buffer(self, name: str) -> memoryview:
+        """Raw ring storage of a channel, not in time order."""
+        return memoryview(self._channels[name])
+
+    def buffers(self, name: str) -> typing.Tuple[memoryview, memoryview]:
+        """Channel in time order as two zero copy slices.
+
+        Returns:
+            [tuple(memoryview, memoryview)]: Older and newer samples.
+        """
+        view = memoryview(self._channels[name])
+        if self._count < self.capacity:
+            return view[:0], view[:self._count]
+        return view[self._head:], view[:self._head]
+
+    def values(self, name: str) -> typing.List[float]:
+        """Copy of a channel in time order."""
+        older, newer = self.buffers(name)
+        return older.tolist() + newer.tolist()
+
+    def latest(self) -> typing.Optional[typing.Dict[str, float]]:
+        """Newest sample by channel name."""
+        if not self._count:
+            return None
+        last = (self._head - 1) % self.capacity
+        return {
+            name: channel[last] for name, channel in self._channels.items()
+        }
+
+    def window(
+        self,
+        name: str,
+        seconds: float = None,
+        now: float = None
+    ) -> typing.Optional[Aggregate]:
+        """Aggregate a channel over the last seconds, or all samples.
+
+        Returns:
+            [Aggregate]: None if there are no samples in the window.
+        """
+        times = self._channels['time']
+        channel = self._channels[name]
+        start = None
+        if seconds is not None:
+            start = (time.time() if now is None else now) - seconds
+
+        count = 0
+        low = math.inf
+        high = -math.inf
+        sum_t = sum_v = sum_tt = sum_tv = 0.0
+        t0 = None
+        for i in self._indices():
+            t = times[i]
+            value = channel[i]
+            if start is not None and t < start:
+                continue
+            if value != value:  # NaN
+                continue
+            if t0 is None:
+                t0 = t  # Offset for precision.
+            t -= t0
+            count += 1
+            low = min(low, value)
+            high = max(high, value)
+            sum_t += t
+            sum_v += value
+            sum_tt += t * t
+            sum_tv += t * value
+
+        if not count:
+            return None
+
+        slope = 0.0
+        div = count * sum_tt - sum_t * sum_t
+        if count > 1 and div > 0:
+            slope = (count * sum_tv - sum_t * sum_v) / div
+        return Aggregate(count, low, high, sum_v / count, slope)
+
+    def _indices(self):
+        if self._count < self.capacity:
+            return range(self._count)
+        return itertools.chain(
+            range(self._head, self.capacity), range(self._head))
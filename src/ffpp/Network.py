@@ -1,18 +1,328 @@
 import logging
 import asyncio
+import collections
+import contextlib
+import random
+import re
+import struct
+import time
 import typing
 
 LOG = logging.getLogger(__name__)
 
 
+class ResponseFramer(object):
+    """ Split the byte stream from the printer into complete responses.
+
+    Every response starts with 'CMD Mxxx Received.' and ends with an
+    'ok' line. The M661 file list is followed by a binary trailer:
+        b'D\xaa\xaa\x00' + count + count * (b'::\xa3\xa3' + len + name)
+    where count and len are 4 byte big endian integers.
+
+    Not every response has the 'ok' line, M26 is only its header line,
+    so a response also ends where the next one starts. The file list
+    trailer is optional. While nothing follows the 'ok' of M661 next()
+    waits and sets trailerPending, next(final=True) then takes the
+    frame without a trailer once the reader stops waiting for more.
+
+    Feed bytes as they are read and take frames when complete,
+    a partial frame stays in the buffer until the rest arrives.
+    """
+    TERMINATOR = b'ok\r\n'
+    FILE_LIST_MAGIC = b'D\xaa\xaa\x00'
+    FILE_NAME_MAGIC = b'::\xa3\xa3'
+    HEADER = b'\nCMD '
+    # Commands answered by the header line alone.
+    HEADER_ONLY = ('M26',)
+    _header = re.compile(rb'CMD\s+M?(\d+)\s+Received')
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._scanned = 0
+        self._skipOk = False  # Drop an 'ok' that follows a header only frame.
+        self.trailerPending = False
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def feed(self, data: bytes):
+        self._buffer += data
+
+    def clear(self):
+        del self._buffer[:]
+        self._scanned = 0
+        self._skipOk = False
+        self.trailerPending = False
+
+    def next(self, final=False) -> typing.Optional[bytes]:
+        """Take the next complete frame.
+
+        Args:
+            final (bool, optional): Nothing more follows for now, a file
+                list without its trailer is complete. Defaults to False.
+
+        Returns:
+            [bytes]: Complete response or None if more data is needed.
+        """
+        buf = self._buffer
+        self.trailerPending = False
+        if self._skipOk:
+            if buf.startswith(self.TERMINATOR):
+                del buf[:len(self.TERMINATOR)]
+            elif self.TERMINATOR.startswith(bytes(buf)):
+                return None  # Not sure yet.
+            self._skipOk = False
+
+        if buf.startswith(self.TERMINATOR):
+            end = len(self.TERMINATOR)
+        elif self.command(buf[:64]) in self.HEADER_ONLY:
+            end = buf.find(b'\n') + 1
+            if end <= 0:
+                return None
+            self._skipOk = True
+        else:
+            # Only scan the new data, keep a few bytes for a split marker.
+            start = max(0, self._scanned - len(self.HEADER))
+            end = buf.find(b'\n' + self.TERMINATOR, start)
+            header = buf.find(self.HEADER, start)
+            if header >= 0 and (end < 0 or header < end):
+                end = header + 1  # The next response started, no 'ok'.
+            elif end < 0:
+                self._scanned = len(buf)
+                return None
+            else:
+                end += 1 + len(self.TERMINATOR)
+                if self.command(buf[:min(end, 64)]) == 'M661':
+                    trailer = self._fileListLength(end, final)
+                    if trailer is None:
+                        self._scanned = end - len(self.TERMINATOR) - 1
+                        return None
+                    end += trailer
+
+        frame = bytes(buf[:end])
+        del buf[:end]
+        self._scanned = 0
+        return frame
+
+    def frames(self) -> typing.List[bytes]:
+        """Take all complete frames."""
+        frames = []
+        frame = self.next()
+        while frame is not None:
+            frames.append(frame)
+            frame = self.next()
+        return frames
+
+    @classmethod
+    def command(cls, frame: bytes) -> typing.Optional[str]:
+        """Command of a response from its 'CMD Mxxx Received' header.
+
+        Returns:
+            [str]: Command like 'M119' or None.
+        """
+        re_result = cls._header.search(frame)
+        if re_result:
+            return 'M' + re_result.group(1).decode()
+        return None
+
+    def _fileListLength(
+        self,
+        offset: int,
+        final: bool
+    ) -> typing.Optional[int]:
+        # Length of the M661 trailer at offset, None if incomplete.
+        buf = self._buffer
+        magic = self.FILE_LIST_MAGIC
+        available = len(buf) - offset
+        if available == 0:
+            # Maybe still in flight, or no file list at all.
+            self.trailerPending = not final
+            return None if self.trailerPending else 0
+        if available < len(magic):
+            if buf[offset:] != magic[:available]:
+                return 0  # Something else, no file list.
+            return None
+        if buf[offset:offset + len(magic)] != magic:
+            return 0
+        pos = offset + len(magic)
+        if len(buf) < pos + 4:
+            return None
+        count = struct.unpack_from('>I', buf, pos)[0]
+        pos += 4
+        for _ in range(count):
+            if len(buf) < pos + len(self.FILE_NAME_MAGIC) + 4:
+                return None
+            pos += len(self.FILE_NAME_MAGIC)
+            length = struct.unpack_from('>I', buf, pos)[0]
+            pos += 4 + length
+            if len(buf) < pos:
+                return None
+        return pos - offset
+
+
+class ControlError(ConnectionError):
+    """ The printer refused control, someone else has it."""
+
+
+class CommandTimeoutError(TimeoutError):
+    """ The printer accepted the connection but did not answer in time."""
+
+
+class CircuitOpenError(ConnectionError):
+    """ The printer failed recently, not tried again until retry_in."""
+
+
+class CircuitBreaker(object):
+    """ Stop calling a printer that keeps failing.
+
+    closed      Calls go through. threshold failures in a row open it.
+    open        Calls fail at once, for a backoff that doubles every
+                time it opens again, from base up to max_delay seconds,
+                spread by +- jitter.
+    half_open   The backoff has passed, one call is let through to try.
+                Success closes it, failure opens it again.
+
+    A threshold of None never opens.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        threshold: typing.Optional[int] = 3,
+        base: float = 1,
+        max_delay: float = 300,
+        jitter: float = 0.2
+    ):
+        self.threshold = threshold
+        self.base = base
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.failures = 0  # In a row.
+        self._opened = 0  # Times opened in a row.
+        self._retry_at: typing.Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self._retry_at is None:
+            return self.CLOSED
+        if self._trial or time.monotonic() >= self._retry_at:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until a call is let through, 0 if now."""
+        if self._retry_at is None:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def allow(self) -> bool:
+        """True if a call may go through now."""
+        if self._retry_at is None:
+            return True
+        now = time.monotonic()
+        if now < self._retry_at:
+            return False
+        # One trial, the others wait for its result or another backoff.
+        self._trial = True
+        self._retry_at = now + self._delay()
+        return True
+
+    def success(self):
+        self.failures = 0
+        self._opened = 0
+        self._retry_at = None
+        self._trial = False
+
+    def failure(self):
+        self.failures += 1
+        if self.threshold is None:
+            return
+        if self._trial or self.failures >= self.threshold:
+            self._opened += 1
+            self._trial = False
+            self._retry_at = time.monotonic() + self._delay()
+
+    def _delay(self) -> float:
+        delay = min(self.max_delay, self.base * 2 ** max(0, self._opened - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
 class Network(object):
-    def __init__(self, ip, port=8899):
+    # Read only commands, a lost exchange of only these is sent again.
+    QUERIES = ('M105', 'M114', 'M115', 'M119', 'M27', 'M661')
+
+    def __init__(
+        self,
+        ip,
+        port=8899,
+        keep_alive=False,
+        idle_timeout=None,
+        connect_timeout: float = 3,
+        command_timeout: float = None,
+        exchange_timeout: float = None,
+        breaker: CircuitBreaker = None
+    ):
         self.ip = ip
         self.port = port
         self.connection = None
         self.responseData: typing.Union[list[bytes], None] = None
 
+        # Deadlines in seconds, None waits for ever. command_timeout is
+        # per write or response, exchange_timeout for all messages of
+        # one sendMessage().
+        self.connect_timeout = connect_timeout
+        self.command_timeout = command_timeout
+        self.exchange_timeout = exchange_timeout
+
+        # Fail fast while the printer is down, see CircuitBreaker.
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+        # Commands sent but not answered yet, by a cancelled or timed
+        # out request. Their responses are dropped before the next one.
+        self._outstanding: typing.List[typing.Optional[str]] = []
+        self.resync_timeout = 2
+        # Wait for a file list trailer after the 'ok' of M661.
+        self.trailer_timeout = 0.2
+
+        # Responses read by the current exchange, see _sendOrRetry().
+        self._answered = 0
+
+        # Requests take turns on the connection, see request().
+        self._busy = False
+        self._waiting: typing.Deque[asyncio.Future] = collections.deque()
+
+        # Persistent connection settings, see ConnectionPool.
+        self.keep_alive = keep_alive
+        self.idle_timeout = idle_timeout
+        self.last_used = None
+
+        # Control lease, see control().
+        self._lease: typing.Optional[asyncio.TimerHandle] = None
+        self._expiry: typing.Optional[asyncio.Task] = None
+
     async def connect(self):
+        """ Open the connection, nothing to do if it is alive.
+
+        Waits for the turn of any request in progress, see request().
+        """
+        async with self._turn():
+            return await self._connect()
+
+    async def _connect(self):
+        if self.isAlive():
+            return True
+        if self.connection is not None:
+            await self.disconnect()  # Close the stale one first.
+
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                f"Printer {self.ip} is down, "
+                f"retry in {self.breaker.retry_in:.1f} seconds.")
+
         self.connection = asyncio.open_connection(
             self.ip,
             self.port,
@@ -20,13 +330,18 @@ class Network(object):
         try:
             self._reader, self._writer = await asyncio.wait_for(
                 self.connection,
-                timeout=3
+                timeout=self.connect_timeout
             )
         except Exception as e:  # CancelError and TimeoutError
             LOG.debug("Unable to connect")
             self.connection = None
+            self.breaker.failure()
             raise TimeoutError(e) from e
 
+        # Fresh buffer, nothing from an old connection may leak.
+        self._framer = ResponseFramer()
+        self._outstanding = []
+        self.last_used = time.monotonic()
         return True
 
     async def disconnect(self):
@@ -35,37 +350,420 @@ class Network(object):
         except Exception:
             pass
         self.connection = None
+        self._endLease()  # Control is lost with the connection.
+        return True
+
+    async def release(self):
+        """ Done with the connection for now. A keep alive
+        connection, or one holding a control lease, is left
+        open for the next call, otherwise it is closed.
+        """
+        if not self.keep_alive and not self.hasControl:
+            await self.disconnect()
         return True
 
-    async def sendMessage(self, messages: typing.List[str], disconnect=True):
+    @property
+    def hasControl(self):
+        """ True while a control lease is held."""
+        return self._lease is not None
+
+    @contextlib.asynccontextmanager
+    async def control(self, timeout: float = 60):
+        """ Take control once for a batch of control commands.
+
+        Control commands sent inside the block are not wrapped in
+        their own M601/M602 pair. Control is released on exit, or
+        after timeout seconds if the block takes longer.
+
+        Example:
+            async with network.control():
+                await network.sendSetLedState(False)
+                await network.sendSetTemperature(210)
+                await network.sendPrintRequest('My Box.gx')
+
+        Args:
+            timeout (float, optional): Lease timeout in seconds.
+
+        Raises:
+            ControlError: The printer refused control.
+        """
+        response = await self.sendControlRequest(disconnect=False)
+        if not self.isControlSuccess(response):
+            await self.release()
+            raise ControlError(response)
+
+        loop = asyncio.get_running_loop()
+        self._lease = loop.call_later(timeout, self._leaseTimeout)
+        try:
+            yield self
+        finally:
+            if self.hasControl:
+                self._endLease()
+                try:
+                    await self.sendControlRelease(disconnect=False)
+                finally:
+                    await self.release()
+
+    @staticmethod
+    def isControlSuccess(response: typing.Optional[str]) -> bool:
+        """ True if a M601 response granted control."""
+        return bool(response) and "Control failed" not in response
+
+    def _leaseTimeout(self):
+        # Keep the task, the loop only holds a weak reference to it.
+        self._expiry = asyncio.ensure_future(self._expireLease())
+
+    async def _expireLease(self):
+        if self.hasControl:
+            LOG.debug("Control lease on %s timed out.", self.ip)
+            self._endLease()
+            try:
+                await self.sendControlRelease()
+            except (ConnectionError, TimeoutError) as e:
+                LOG.debug("Unable to release control of %s: %s", self.ip, e)
+
+    def _endLease(self):
+        if self._lease is not None:
+            self._lease.cancel()
+            self._lease = None
+
+    def _controlMessages(self, message: str) -> typing.List[str]:
+        # Wrap in M601/M602 unless a lease already holds control.
+        if self.hasControl:
+            return [message]
+        return [
+            self._getControlRequestMessage,
+            message,
+            self._getControlReleaseMessage,
+        ]
+
+    def _controlResponse(self, responses: typing.List[bytes]) -> str:
+        # Response of the wrapped control command.
+        if len(responses) == 1:
+            index = 0
+        else:
+            index = 1
+            if responses:
+                control = responses[0].decode('utf8', 'ignore')
+                if not self.isControlSuccess(control):
+                    LOG.warning("Printer %s refused control.", self.ip)
+                    return ""
+
+        if len(responses) > index:
+            return responses[index].decode('utf8', 'ignore')
+        return ""
+
+    def isBusy(self):
+        """ True while a request holds or waits for the connection."""
+        return self._busy or bool(self._waiting)
+
+    def isAlive(self):
+        """ Health check of an open connection.
+
+        Returns:
+            [bool]: False if not connected, closed by the printer
+            or idle for longer than idle_timeout.
+        """
+        if self.connection is None:
+            return False
+        try:
+            if self._writer.is_closing() or self._reader.at_eof():
+                return False
+        except Exception:
+            return False
+        if self.idle_timeout is not None and self.last_used is not None:
+            if time.monotonic() - self.last_used > self.idle_timeout:
+                return False
+        return True
+
+    async def request(
+        self,
+        messages: typing.List[str],
+        disconnect=True,
+        pipeline=False,
+        timeout: float = None
+    ) -> typing.List[bytes]:
+        """ Send messages and return their responses.
+
+        Safe to call from many coroutines sharing this network, the
+        requests take turns on the connection in call order and each
+        one gets its own responses. Arguments as sendMessage().
+
+        Returns:
+            [list[bytes]]: Responses, empty if there was none.
+        """
+        async with self._turn():
+            await self._sendMessage(messages, disconnect, pipeline, timeout)
+            return list(self.responseData)
+
+    @contextlib.asynccontextmanager
+    async def _turn(self):
+        # Exclusive use of the connection, in call order.
+        if self._busy:
+            await self._waitTurn()
+        self._busy = True
+        try:
+            yield
+        finally:
+            self._nextTurn()
+
+    async def _waitTurn(self):
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future in self._waiting:
+                self._waiting.remove(future)
+            elif not future.cancelled():
+                self._nextTurn()  # Got the turn while cancelled, pass it on.
+            raise
+
+    def _nextTurn(self):
+        while self._waiting:
+            future = self._waiting.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self._busy = False
+
+    async def sendMessage(
+        self,
+        messages: typing.List[str],
+        disconnect=True,
+        pipeline=False,
+        timeout: float = None
+    ):
+        """ Send messages and collect the responses in responseData.
+
+        responseData is shared, when requests may run concurrently use
+        the responses returned by request() instead.
+
+        Args:
+            messages (list[str] | str): Messages to send.
+            disconnect (bool, optional): Release connection when done.
+            pipeline (bool, optional): Write all messages at once and
+                match the responses by their 'CMD Mxxx Received' header,
+                one round trip instead of one per message.
+                Defaults to False.
+            timeout (float, optional): Deadline for the whole exchange.
+                Defaults to exchange_timeout.
+
+        Raises:
+            CommandTimeoutError: No answer in time. A keep alive or
+                controlling connection stays open, the late answers are
+                dropped before the next request. Others are closed.
+
+        Returns:
+            [bool]: True if there was any response.
+        """
+        responses = await self.request(messages, disconnect, pipeline, timeout)
+        return len(responses) > 0
+
+    async def _sendMessage(self, messages, disconnect, pipeline, timeout):
         self.responseData = []
 
         if type(messages) is not list:
             messages = [messages]
 
+        reused = False
+        if self.connection is not None:
+            if self.isAlive():
+                reused = True
+                self.last_used = time.monotonic()  # In use, not idle.
+            else:
+                LOG.debug("Connection to %s is stale, reconnect.", self.ip)
+                await self.disconnect()
+
+        if reused and self._outstanding and not await self._resync():
+            LOG.debug("Unable to resync with %s, reconnect.", self.ip)
+            await self.disconnect()
+            reused = False
+
         if self.connection is None:
-            await self.connect()
+            await self._connect()
+
+        if timeout is None:
+            timeout = self.exchange_timeout
 
-        # Send all messages.
         try:
-            while len(messages) > 0:
-                send = messages.pop(0)
-                self._writer.write(send.encode())
-                await self._writer.drain()  # Wait for it to be sent.
-                data = await self._reader.read(1024)
-                if data:
-                    self.responseData.append(data)
+            await self._sendOrRetry(messages, pipeline, timeout, reused)
+        except CircuitOpenError:
+            raise  # Nothing was tried.
+        except (CommandTimeoutError, ConnectionError):
+            # Failed exchange, a failed reconnect counted itself.
+            self.breaker.failure()
+            raise
+        self.breaker.success()
+
+        self.last_used = time.monotonic()
+        if disconnect and not self._waiting:
+            # Otherwise the next request in line uses the connection.
+            await self.release()
+
+    async def sendRequests(
+        self,
+        messages: typing.List[str],
+        disconnect=True,
+        decode=True,
+        timeout: float = None
+    ) -> typing.List[typing.Union[str, bytes]]:
+        """ Send a batch of requests in one pipelined exchange.
+
+        Args:
+            messages (list[str]): Messages like '~M119\r\n'.
+            decode (bool, optional): Decode the responses, or leave
+                them as bytes. Defaults to True.
+            timeout (float, optional): Deadline for the exchange.
+
+        Returns:
+            [list[str | bytes]]: Response for each message, in the same
+            order as messages. Empty if there was no response.
+        """
+        responses = await self.request(
+            list(messages), disconnect, pipeline=True, timeout=timeout)
+
+        if not decode:
+            return responses
+        return [data.decode('utf8', 'ignore') for data in responses]
+
+    async def _sendOrRetry(self, messages, pipeline, timeout, reused):
+        # Exchange, once more on a new connection if a reused one is lost.
+        self._answered = 0
+        try:
+            await self._exchange(list(messages), pipeline, timeout)
+        except CommandTimeoutError:
+            # A kept connection is resynced by the next request.
+            LOG.debug("Printer %s did not answer in time.", self.ip)
+            await self.release()
+            raise
         except Exception as e:
-            LOG.debug("Unable to send.")
             await self.disconnect()
-            raise ConnectionError(e) from e
+            if not reused or self._answered or not self._isQuery(messages):
+                # Sent again it could run twice, a print started twice.
+                LOG.debug("Unable to send.")
+                raise ConnectionError(e) from e
+
+            # The printer dropped a reused connection, reconnect once.
+            LOG.debug("Reused connection to %s lost, reconnect.", self.ip)
+            await self._connect()
+            try:
+                await self._exchange(list(messages), pipeline, timeout)
+            except CommandTimeoutError:
+                await self.release()
+                raise
+            except Exception as e:
+                LOG.debug("Unable to send.")
+                await self.disconnect()
+                raise ConnectionError(e) from e
+
+    async def _exchange(self, messages, pipeline, timeout):
+        if timeout is None:
+            await self._send(messages, pipeline)
+            return
+        try:
+            await asyncio.wait_for(self._send(messages, pipeline), timeout)
+        except asyncio.TimeoutError as e:
+            raise CommandTimeoutError(
+                f"No answer from {self.ip} within {timeout} seconds.") from e
+
+    async def _deadline(self, awaitable):
+        # Await one write or response within command_timeout.
+        if self.command_timeout is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, self.command_timeout)
+        except asyncio.TimeoutError as e:
+            raise CommandTimeoutError(
+                f"No answer from {self.ip} within "
+                f"{self.command_timeout} seconds.") from e
 
-        if disconnect:
-            await self.disconnect()
+    async def _send(self, messages: typing.List[str], pipeline=False):
+        if pipeline:
+            await self._sendPipelined(messages)
+            return
 
-        if self.responseData and len(self.responseData) > 0:
-            return True
-        return False
+        # Send all messages.
+        while len(messages) > 0:
+            send = messages.pop(0)
+            self._outstanding.append(self._command(send))
+            self._writer.write(send.encode())
+            # Wait for it to be sent.
+            await self._deadline(self._writer.drain())
+            data = await self._deadline(self._readFrame())
+            self._answered += 1
+            self._settle(ResponseFramer.command(data))
+            if data:
+                self.responseData.append(data)
+
+    async def _sendPipelined(self, messages: typing.List[str]):
+        commands = [self._command(message) for message in messages]
+        self._outstanding.extend(commands)
+        self._writer.write(''.join(messages).encode())
+        await self._deadline(self._writer.drain())
+
+        responses = [b''] * len(messages)
+        for _ in messages:
+            frame = await self._deadline(self._readFrame())
+            self._answered += 1
+            command = ResponseFramer.command(frame)
+            self._settle(command)
+            free = [i for i, data in enumerate(responses) if not data]
+            match = [i for i in free if commands[i] == command]
+            responses[(match or free)[0]] = frame
+
+        self.responseData.extend(responses)
+
+    def _settle(self, command: typing.Optional[str]):
+        # A response arrived, it answers the oldest request of its command.
+        if command in self._outstanding:
+            self._outstanding.remove(command)
+        elif self._outstanding:
+            self._outstanding.pop(0)
+
+    async def _resync(self) -> bool:
+        # Drop the responses of cancelled or timed out requests.
+        try:
+            while self._outstanding:
+                frame = await asyncio.wait_for(
+                    self._readFrame(), self.resync_timeout)
+                command = ResponseFramer.command(frame)
+                LOG.debug("Dropped stale %s response from %s.",
+                          command, self.ip)
+                self._settle(command)
+        except (asyncio.TimeoutError, ConnectionError):
+            return False
+        return True
+
+    @classmethod
+    def _isQuery(cls, messages: typing.List[str]) -> bool:
+        return all(cls._command(m) in cls.QUERIES for m in messages)
+
+    @staticmethod
+    def _command(message: str) -> typing.Optional[str]:
+        # '~M119\r\n' -> 'M119'
+        re_result = re.match(r'~?(M\d+)', message)
+        if re_result:
+            return re_result.group(1)
+        return None
+
+    async def _readFrame(self) -> bytes:
+        # Read until one complete response is buffered.
+        frame = self._framer.next()
+        while frame is None:
+            if self._framer.trailerPending:
+                try:
+                    data = await asyncio.wait_for(
+                        self._reader.read(4096), self.trailer_timeout)
+                except asyncio.TimeoutError:
+                    return self._framer.next(final=True)  # No file list.
+            else:
+                data = await self._reader.read(4096)
+            if not data:
+                raise ConnectionError("Connection closed by printer.")
+            self._framer.feed(data)
+            frame = self._framer.next()
+        return frame
 
     async def sendControlRequest(self, disconnect=True):
         """Send Control message to printer.
@@ -78,10 +776,11 @@ class Network(object):
         Returns:
             [string]: Return response from printer.
         """
-        await self.sendMessage(self._getControlRequestMessage, disconnect)
+        responses = await self.request(
+            self._getControlRequestMessage, disconnect)
 
-        if self.responseData and len(self.responseData) > 0:
-            return self.responseData[0].decode('utf8', 'ignore')
+        if responses:
+            return responses[0].decode('utf8', 'ignore')
         return None
 
     @property
@@ -96,10 +795,11 @@ class Network(object):
         Returns:
             [string]: Return response from printer.
         """
-        await self.sendMessage(self._getControlReleaseMessage, disconnect)
+        responses = await self.request(
+            self._getControlReleaseMessage, disconnect)
 
-        if self.responseData and len(self.responseData) > 0:
-            return self.responseData[0].decode('utf8', 'ignore')
+        if responses:
+            return responses[0].decode('utf8', 'ignore')
         return None
 
     @property
@@ -123,10 +823,10 @@ class Network(object):
         Returns:
             [string]: Return response from printer.
         """
-        await self.sendMessage('~M115\r\n', disconnect)
+        responses = await self.request('~M115\r\n', disconnect)
 
-        if self.responseData and len(self.responseData) > 0:
-            return self.responseData[0].decode('utf8', 'ignore')
+        if responses:
+            return responses[0].decode('utf8', 'ignore')
         return ""
 
     async def sendProgressRequest(self, disconnect=True):
@@ -138,10 +838,10 @@ class Network(object):
         Returns:
             [string]: Return response from printer.
         """
-        await self.sendMessage('~M27\r\n', disconnect)
+        responses = await self.request('~M27\r\n', disconnect)
 
-        if self.responseData and len(self.responseData) > 0:
-            return self.responseData[0].decode('utf8', 'ignore')
+        if responses:
+            return responses[0].decode('utf8', 'ignore')
         return ""
 
     async def sendTempRequest(self, disconnect=True):
@@ -153,10 +853,10 @@ class Network(object):
         Returns:
             [string]: Return response from printer.
         """
-        await self.sendMessage('~M105\r\n', disconnect)
+        responses = await self.request('~M105\r\n', disconnect)
 
-        if self.responseData and len(self.responseData) > 0:
-            return self.responseData[0].decode('utf8', 'ignore')
+        if responses:
+            return responses[0].decode('utf8', 'ignore')
         return ""
 
     async def sendPositionRequest(self, disconnect=True):
@@ -168,10 +868,10 @@ class Network(object):
         Returns:
             [string]: Return response from printer.
         """
-        await self.sendMessage('~M114\r\n', disconnect)
+        responses = await self.request('~M114\r\n', disconnect)
 
-        if self.responseData and len(self.responseData) > 0:
-            return self.responseData[0].decode('utf8', 'ignore')
+        if responses:
+            return responses[0].decode('utf8', 'ignore')
         return ""
 
     async def sendStatusRequest(self, disconnect=True):
@@ -190,10 +890,10 @@ class Network(object):
         Returns:
             [string]: Return response from printer.
         """
-        await self.sendMessage('~M119\r\n', disconnect)
+        responses = await self.request('~M119\r\n', disconnect)
 
-        if self.responseData and len(self.responseData) > 0:
-            return self.responseData[0].decode('utf8', 'ignore')
+        if responses:
+            return responses[0].decode('utf8', 'ignore')
         return ""
 
     async def sendSetTemperature(self, temp, disconnect=True):
@@ -205,16 +905,10 @@ class Network(object):
         Returns:
             [string]: Return response from printer.
         """
-        messages = [
-            self._getControlRequestMessage,
-            f'~M104 S{temp} T0',
-            self._getControlReleaseMessage,
-        ]
-        await self.sendMessage(messages, disconnect)
+        messages = self._controlMessages(f'~M104 S{temp} T0\r\n')
+        responses = await self.request(messages, disconnect, pipeline=True)
 
-        if len(self.responseData) > 1:
-            return self.responseData[1].decode('utf8', 'ignore')
-        return ""
+        return self._controlResponse(responses)
 
     async def sendSetLedState(self, state, disconnect=True):
         """ Turn led on or off
@@ -226,16 +920,11 @@ class Network(object):
             [string]: Return response from printer.
         """
         state = 255 if state else 0
-        messages = [
-            self._getControlRequestMessage,
-            f'~M146 r{state} g{state} b{state} F0\r\n',
-            self._getControlReleaseMessage,
-        ]
-        await self.sendMessage(messages, disconnect)
+        messages = self._controlMessages(
+            f'~M146 r{state} g{state} b{state} F0\r\n')
+        responses = await self.request(messages, disconnect, pipeline=True)
 
-        if len(self.responseData) > 1:
-            return self.responseData[1].decode('utf8', 'ignore')
-        return ""
+        return self._controlResponse(responses)
 
     async def sendGetFileNames(self, disconnect=True):
         """ Get the filenames stored on the printer.
@@ -245,10 +934,10 @@ class Network(object):
             [list]: Filenames as string
         """
         # Don't decode this strait away.
-        await self.sendMessage('~M661\r\n', disconnect)
+        responses = await self.request('~M661\r\n', disconnect)
 
-        if self.responseData and len(self.responseData) > 0:
-            response = self.responseData[0]
+        if responses:
+            response = responses[0]
         else:
             return None
         bytefileNames = response.split(b'::\xa3\xa3\x00\x00\x00')
@@ -279,16 +968,10 @@ class Network(object):
         Returns:
             [string]: Return response from printer.
         """
-        messages = [
-            self._getControlRequestMessage,
-            '~M25\r\n',
-            self._getControlReleaseMessage,
-        ]
-        await self.sendMessage(messages, disconnect)
+        messages = self._controlMessages('~M25\r\n')
+        responses = await self.request(messages, disconnect, pipeline=True)
 
-        if len(self.responseData) > 1:
-            return self.responseData[1].decode('utf8', 'ignore')
-        return ""
+        return self._controlResponse(responses)
 
     async def sendContinueRequest(self, disconnect=True):
         """ Continue current print.
@@ -299,16 +982,10 @@ class Network(object):
         Returns:
             [string]: Return response from printer.
         """
-        messages = [
-            self._getControlRequestMessage,
-            '~M24\r\n',
-            self._getControlReleaseMessage,
-        ]
-        await self.sendMessage(messages, disconnect)
+        messages = self._controlMessages('~M24\r\n')
+        responses = await self.request(messages, disconnect, pipeline=True)
 
-        if len(self.responseData) > 1:
-            return self.responseData[1].decode('utf8', 'ignore')
-        return ""
+        return self._controlResponse(responses)
 
     async def sendPrintRequest(self, file, disconnect=True):
         """ Print file print.
@@ -327,16 +1004,10 @@ class Network(object):
         Returns:
             [string]: Return response from printer.
         """
-        messages = [
-            self._getControlRequestMessage,
-            f'~M23 0:/user/{file}\r\n',
-            self._getControlReleaseMessage,
-        ]
-        await self.sendMessage(messages, disconnect)
+        messages = self._controlMessages(f'~M23 0:/user/{file}\r\n')
+        responses = await self.request(messages, disconnect, pipeline=True)
 
-        if len(self.responseData) > 1:
-            return self.responseData[1].decode('utf8', 'ignore')
-        return ""
+        return self._controlResponse(responses)
 
     async def sendAbortRequest(self, disconnect=True):
         """ Abort file print.
@@ -347,13 +1018,113 @@ class Network(object):
         Returns:
             [string]: Return response from printer.
         """
-        messages = [
-            self._getControlRequestMessage,
-            '~M26\r\n',
-            self._getControlReleaseMessage,
-        ]
-        await self.sendMessage(messages, disconnect)
+        messages = self._controlMessages('~M26\r\n')
+        responses = await self.request(messages, disconnect, pipeline=True)
+
+        return self._controlResponse(responses)
+
+
+class ConnectionPool(object):
+    """ Keep one long lived connection per printer.
+
+    Networks handed out by the pool are keep alive, so the
+    disconnect argument of the send methods only releases the
+    connection back to the pool. Connections idle for longer
+    than idle_timeout are closed and reopened on next use.
+
+    Example:
+        pool = ConnectionPool(idle_timeout=60)
+        net = pool.get('192.168.0.10')
+        await net.sendStatusRequest()
+        ...
+        await pool.close_all()
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = 60,
+        port: int = 8899,
+        connect_timeout: float = 3,
+        command_timeout: float = None
+    ):
+        self.idle_timeout = idle_timeout
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.command_timeout = command_timeout
+        self._networks: typing.Dict[typing.Tuple[str, int], Network] = {}
+        self._reaper: typing.Optional[asyncio.Task] = None
 
-        if len(self.responseData) > 1:
-            return self.responseData[1].decode('utf8', 'ignore')
-        return ""
+    def __len__(self):
+        return len(self._networks)
+
+    def __iter__(self):
+        return iter(self._networks.values())
+
+    def get(self, ip: str, port: int = None) -> Network:
+        """Return the shared Network for a printer, create it if needed.
+
+        Args:
+            ip (str): Printer ip.
+            port (int, optional): Printer port. Defaults to pool port.
+
+        Returns:
+            [Network]: A keep alive network for this printer.
+        """
+        key = (ip, port or self.port)
+        network = self._networks.get(key)
+        if network is None:
+            network = Network(
+                key[0], key[1],
+                keep_alive=True,
+                idle_timeout=self.idle_timeout,
+                connect_timeout=self.connect_timeout,
+                command_timeout=self.command_timeout
+            )
+            self._networks[key] = network
+        self._startReaper()
+        return network
+
+    async def prune(self):
+        """ Close connections that are dead or idle too long.
+
+        Returns:
+            [int]: Number of closed connections.
+        """
+        closed = 0
+        for network in list(self._networks.values()):
+            if network.isBusy():
+                continue  # Idle again once its requests are done.
+            if network.connection is not None and not network.isAlive():
+                LOG.debug("Close idle connection to %s", network.ip)
+                await network.disconnect()
+                closed += 1
+        return closed
+
+    async def close_all(self):
+        """ Close every connection and stop the idle reaper."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for network in self._networks.values():
+            await network.disconnect()
+        self._networks.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close_all()
+
+    def _startReaper(self):
+        if self._reaper is not None or not self.idle_timeout:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Pruned on next use instead.
+        self._reaper = loop.create_task(self._reap())
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(self.idle_timeout / 2)
+            await self.prune()
@@ -1,9 +1,16 @@
-from enum import IntEnum
+import asyncio
+import contextlib
+from enum import IntEnum, IntFlag
 import logging
 import re
+import time
 import typing
 
-from .Network import Network
+from .Cache import MachineInfoCache
+from .Discovery import DiscoveredPrinter
+from .History import TelemetryHistory
+from .Network import ConnectionPool, Network
+from .Watch import COALESCE, TEMPERATURE, Subscription
 
 LOG = logging.getLogger(__name__)
 
@@ -14,21 +21,47 @@ class ConnectionStatus(IntEnum):
     CONTROL = 2
 
 
+class UpdateGroup(IntFlag):
+    """ Command groups refreshed by Printer.update()."""
+    STATUS = 1  # M119
+    TEMPERATURE = 2  # M105
+    PROGRESS = 4  # M27
+    POSITION = 8  # M114
+    DEFAULT = STATUS | TEMPERATURE | PROGRESS
+    ALL = DEFAULT | POSITION
+
+
 class field(object):
-    def __init__(self, name, value, regex, flags=re.I):  # noqa
+    """ Schema of one printer value, defined once on the Printer class.
+
+    The value itself is stored per printer in its _values list,
+    so a printer holds nothing but the values.
+    """
+    __slots__ = ("name", "index")
+
+    def __init__(self, name):
         self.name = name
-        self.value = value
+        self.index = None
 
-        if type(regex) is not re.Pattern:
-            self.regex = re.compile(regex, flags)
-        else:
-            self.regex = regex
+    def __set_name__(self, owner, attr):
+        self.index = len(owner._fields)
+        owner._fields = owner._fields + (self,)
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return obj._values[self.index]
+
+    def __set__(self, obj, value):
+        obj._values[self.index] = value
 
     def __repr__(self):
         return self.name
 
 
 class temperatures(object):
+    __slots__ = ("name", "now", "target")
+
     def __init__(self, name, temp, target=None):
         self.name = name.lower()
         self.now = float(temp)
@@ -39,10 +72,10 @@ class ToolHandler(object):
 
     def __init__(self):
         self._tools: dict[str, temperatures] = {}
-        pass
+        self._order: list[temperatures] = []  # For get by index.
 
     def __iter__(self):
-        return iter(self._tools.values())
+        return iter(self._order)
 
     def __len__(self):
         return len(self._tools)
@@ -60,10 +93,10 @@ class ToolHandler(object):
             return None
 
         if not name:
-            return list(self._tools.values())[0]
+            return self._order[0]
 
         if type(name) is int:
-            return list(self._tools.values())[name]
+            return self._order[name]
 
         try:
             return self._tools[name.lower()]
@@ -71,186 +104,353 @@ class ToolHandler(object):
             return None
 
     def add(self, t: temperatures):
+        old = self._tools.get(t.name)
+        if old is not None:
+            self._order[self._order.index(old)] = t
+        else:
+            self._order.append(t)
         self._tools[t.name] = t
 
+    def set(self, name: str, now, target):
+        """Update a tool in place, add it if it is new.
+
+        Returns:
+            [temperatures]: The updated temperature object.
+        """
+        t = self._tools.get(name.lower())
+        if t is None:
+            t = temperatures(name, now, target)
+            self.add(t)
+        else:
+            t.now = float(now)
+            t.target = float(target)
+        return t
+
     def delete(self, name: str):
-        return self._tools.pop(name.lower(), None)
+        t = self._tools.pop(name.lower(), None)
+        if t is not None:
+            self._order.remove(t)
+        return t
+
+
+def _number(value) -> typing.Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _Flight(object):
+    # An update in progress and the callers waiting for it.
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
 
 
 class Printer(object):
 
-    def __init__(self, ip, port=8899):
+    # Field schema shared by all printers, see field.
+    _fields: typing.Tuple[field, ...] = ()
+
+    # Machine info fields
+    _machine_type = field("Machine Type")
+    _machine_name = field("Machine Name")
+    _firmware = field("Firmware")
+    _machine_SN = field("Machine SN")
+    _maxX = field("MaxX")
+    _maxY = field("MaxY")
+    _maxZ = field("MaxZ")
+    _extruder_count = field("Extruder Count")
+    _mac_address = field("Mac Address")
+
+    # Status fields
+    _machine_status = field("Machine Status")
+    _move_mode = field("Move Mode")
+    _status = field("Status")
+    _led = field("LED")
+    _job_file = field("Current File")
+
+    # Progress fields
+    _print_percent = field("Print Percent")
+    _print_layer = field("Print layer")
+    _job_layers = field("Print Total layer")
+
+    # Position fields
+    _position_x = field("Position X")
+    _position_y = field("Position Y")
+    _position_z = field("Position Z")
+
+    # Command and parser of each group, sent pipelined by update().
+    _updateMessages = (
+        (UpdateGroup.STATUS, '~M119\r\n', '_parseStatus'),
+        (UpdateGroup.TEMPERATURE, '~M105\r\n', '_parseTemperature'),
+        (UpdateGroup.PROGRESS, '~M27\r\n', '_parseProgress'),
+        (UpdateGroup.POSITION, '~M114\r\n', '_parsePosition'),
+    )
+    _infoMessage = '~M115\r\n'
+
+    def __init__(
+        self,
+        ip,
+        port: int = None,
+        pool: ConnectionPool = None,
+        history: int = 0,
+        identity: DiscoveredPrinter = None,
+        cache: MachineInfoCache = None,
+        timeout: float = None
+    ):
         # Instance Variables
         self.connected: ConnectionStatus = ConnectionStatus.DISCONNECTED
-        self.network = Network(ip, port)
-
-        # Machine info fields
-        self._machine_type = field(
-            "Machine Type", None, r"Machine Type\s?:\s?(.*?)\r\n")
-        self._machine_name = field(
-            "Machine Name", None, r"Machine Name\s?:\s?(.*?)\r\n")
-        self._firmware = field(
-            "Firmware", None, r"Firmware\s?:\s?(.*?)\r\n")
-        self._machine_SN = field(
-            "Machine SN", None, r"SN\s?:\s?(.*?)\r\n")
-        self._maxX = field(
-            "MaxX", None, r"X\s?:\s?(\d+)(?:\s|\r\n)")
-        self._maxY = field(
-            "MaxY", None, r"Y\s?:\s?(\d+)(?:\s|\r\n)")
-        self._maxZ = field(
-            "MaxZ", None, r"Z\s?:\s?(\d+)(?:\s|\r\n)")
-        self._extruder_count = field(
-            "Extruder Count", None, r"Tool Count\s?:\s?(.*?)\r\n")
-        self._mac_address = field(
-            "Mac Address", None, r"Mac Address\s?:\s?([0-9a-fA-F:]+)")
-        self._machine_status = field(
-            "Machine Status", None, r"MachineStatus\s?:\s?(.*?)\r\n")
-        self._move_mode = field(
-            "Move Mode", None, r"MoveMode\s?:\s?(.*?)\r\n")
-        self._status = field(
-            "Status", None, r"(?:\n|\A)Status\s?:\s?(.*?)\r\n")
-        self._led = field(
-            "LED", None, r"LED\s?:\s?(.*?)\r\n")
-        self._job_file = field(
-            "Current File", None, r"CurrentFile\s?:\s?(.*?)\r\n")
-        self._extruder_temp = field(
-           "Extruder Temp", None, r"(T0)\s?:\s?(\d+(?:\.\d+)?)/(\d+(?:\.\d+)?)")
-        self._bed_temp = field(
-            "Bed Temp", None, r"(B)\s?:\s?(\d+(?:\.\d+)?)/(\d+(?:\.\d+)?)")
-        self._print_percent = field(
-            "Print Percent", None, r"byte\s?(\d+)/\d+")
-        self._print_layer = field(
-            "Print layer", None, r"Layer:\s?(\d+)/(\d+)")
-        self._job_layers = field(
-            "Print Total layer", None, r"Layer:\s?\d+/(\d+)")
+        if port is None:
+            port = identity and identity.port or 8899
+        if pool is not None:
+            # Shared keep alive connection, disconnect only releases it.
+            # Its deadlines are those of the pool.
+            self.network = pool.get(ip, port)
+        else:
+            # The deadline of control commands too, like setLed().
+            self.network = Network(ip, port, exchange_timeout=timeout)
+
+        self._values = [None] * len(self._fields)
+
+        # Deadline of each update exchange, None waits for ever.
+        self.timeout = timeout
+
+        # Single flight updates by groups, and when each group was
+        # last updated, time.monotonic().
+        self._flights: typing.Dict[UpdateGroup, _Flight] = {}
+        self._connecting: typing.Optional[asyncio.Future] = None
+        self._updated: typing.Dict[UpdateGroup, float] = {}
 
         self.extruder_tools = ToolHandler()
 
         self.bed_tools = ToolHandler()
 
+        # Optional telemetry of the last history updates.
+        self.history: typing.Optional[TelemetryHistory] = None
+        if history:
+            self.history = TelemetryHistory(history)
+
+        self._subscriptions: typing.List[Subscription] = []
+
+        # Machine info from cache, checked again by the next update().
+        self.cache = cache
+        self._infoStale = False
+
+        # Known from discovery, connect() then skips M115 and leaves
+        # the rest of the machine info to the next update().
+        if identity is not None:
+            self._machine_name = identity.name
+            self._machine_SN = identity.serial
+            self._machine_type = identity.model
+
     async def connect(self):
         if self.connected is ConnectionStatus.DISCONNECTED:
-            connected = False
-            try:
+            # Concurrent callers wait for the first one.
+            if self._connecting is None:
+                self._connecting = asyncio.ensure_future(self._connect())
+                self._connecting.add_done_callback(self._connected)
+            await asyncio.shield(self._connecting)
+
+        return True
+
+    def _connected(self, task):
+        self._connecting = None
+
+    async def _connect(self):
+        if self.connected is ConnectionStatus.DISCONNECTED:
+            connected = self.network.isAlive()
+            if not connected:
                 connected = await self.network.connect()
-            except TimeoutError:
-                raise
 
             if connected:
                 self.connected = ConnectionStatus.CONNECTED
 
-                await self.updateMachineInfo(disconnect=False)
+                # Known from discovery or the cache, M115 is then sent
+                # with the next update().
+                self._loadMachineInfo()
+                known = self._machine_name is not None \
+                    and self._machine_SN is not None
+                if not known:
+                    await self.updateMachineInfo(disconnect=False)
                 await self.update(disconnect=True)
-
-        return True
+                self._infoStale = known
 
     @property
     def machine_type(self):
-        return self._machine_type.value
+        return self._machine_type
 
     @property
     def machine_name(self):
-        return self._machine_name.value
+        return self._machine_name
 
     @property
     def firmware(self):
-        return self._firmware.value
+        return self._firmware
 
     @property
     def serial(self):
-        return self._machine_SN.value
+        return self._machine_SN
 
     @property
     def maxX(self):
-        return self._maxX.value
+        return self._maxX
 
     @property
     def maxY(self):
-        return self._maxY.value
+        return self._maxY
 
     @property
     def maxZ(self):
-        return self._maxZ.value
+        return self._maxZ
 
     @property
     def extruder_count(self):
-        return self._extruder_count.value
+        return self._extruder_count
 
     @property
     def mac_address(self):
-        return self._mac_address.value
+        return self._mac_address
 
     @property
     def machine_status(self):
         """ READY       BUILDING_FROM_SD """
-        return self._machine_status.value
+        return self._machine_status
 
     @property
     def move_mode(self):
         """ READY        MOVING """
-        return self._move_mode.value
+        return self._move_mode
 
     @property
     def status(self):
         """ S:1 L:0 J:0 F:0 """
-        return self._status.value
+        return self._status
 
     @property
     def led(self):
         """ 0       1 """
-        return True if self._led.value == "1" else False
+        return True if self._led == "1" else False
 
     @property
     def job_file(self):
         """ file.gx      """
-        return self._job_file.value
+        return self._job_file
 
     @property
     def print_percent(self):
-        return self._print_percent.value
+        return self._print_percent
 
     @property
     def print_layer(self):
-        return self._print_layer.value
+        return self._print_layer
 
     @property
     def job_layers(self):
-        return self._job_layers.value
+        return self._job_layers
+
+    @property
+    def position(self):
+        """(x, y, z) from the last POSITION update."""
+        return (self._position_x, self._position_y, self._position_z)
 
     async def updateMachineInfo(self, disconnect=True):
         if not self.connected:
             LOG.info("Machine is not connected")
             await self.connect()
 
-        response = await self.network.sendInfoRequest(disconnect=False)
+        response, = await self.network.sendRequests(
+            [self._infoMessage], disconnect=False, decode=False,
+            timeout=self.timeout)
         if not response:
             return
 
-        dataField = [
-            self._machine_type,
-            self._machine_name,
-            self._firmware,
-            self._machine_SN,
-            self._maxX,
-            self._maxY,
-            self._maxZ,
-            self._extruder_count,
-            self._mac_address
-        ]
-
-        for field in dataField:
-            re_result = field.regex.search(response)
-            if re_result:
-                field.value = re_result.group(1)
+        self._parseMachineInfo(response)
+        self._storeMachineInfo()
 
         if disconnect:
-            await self.network.disconnect()
+            await self.network.release()
+
+    async def update(
+        self,
+        disconnect=True,
+        groups: UpdateGroup = UpdateGroup.DEFAULT,
+        max_age: float = None
+    ):
+        """Refresh the printer, all groups in one round trip.
 
-    async def update(self, disconnect=True):
+        A call while an update of the same groups is in progress waits
+        for that one instead of sending its own.
+
+        Args:
+            disconnect (bool): Disconnect after update. Defaults to True.
+            groups (UpdateGroup, optional): What to refresh, like
+                UpdateGroup.TEMPERATURE. Defaults to status, temperature
+                and progress.
+            max_age (float, optional): Keep the current values if they
+                are at most max_age seconds old, see dataAge().
+
+        Raises:
+            CommandTimeoutError: No answer within timeout seconds.
+        """
         if not self.connected:
             LOG.info("Machine is not connected")
             await self.connect()
 
+        if max_age is not None:
+            age = self.dataAge(groups)
+            if age is not None and age <= max_age:
+                return
+
+        for flying, flight in self._flights.items():
+            if groups & flying == groups and not flight.task.done():
+                break
+        else:
+            flight = _Flight(asyncio.ensure_future(
+                self._update(disconnect, groups)))
+            self._flights[groups] = flight
+            flight.task.add_done_callback(
+                lambda task, flight=flight: self._land(groups, flight))
+
+        flight.waiters += 1
+        try:
+            await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # No one is waiting for it, no one may join it either.
+                self._land(groups, flight)
+                flight.task.cancel()
+
+    def _land(self, groups: UpdateGroup, flight: _Flight):
+        # Remove the flight, unless a newer one took its place.
+        if self._flights.get(groups) is flight:
+            del self._flights[groups]
+
+    def dataAge(
+        self,
+        groups: UpdateGroup = UpdateGroup.DEFAULT
+    ) -> typing.Optional[float]:
+        """Seconds since groups were last updated.
+
+        Returns:
+            [float]: Age of the oldest of the groups, None if one of
+            them was never updated.
+        """
+        now = time.monotonic()
+        age = 0.0
+        for group, _, _ in self._updateMessages:
+            if group & groups:
+                updated = self._updated.get(group)
+                if updated is None:
+                    return None
+                age = max(age, now - updated)
+        return age
+
+    async def _update(self, disconnect, groups):
+
         # Update current status etc.
         """
         'CMD M119 Received.\r\n
@@ -261,71 +461,281 @@ class Printer(object):
         LED: 0\r\n
         CurrentFile: \r\n
         ok\r\n'
+        'CMD M105 Received.\r\nT0:22/0 B:14/0\r\nok\r\n'
+        'CMD M27 Received.\r\nSD printing byte 0/100\r\nok\r\n'
         """
-        response = await self.network.sendStatusRequest(disconnect=False)
-        if not response:
-            return
-
-        dataField = [
-            self._machine_status,
-            self._move_mode,
-            self._status,
-            self._led,
-            self._job_file
-        ]
+        parsers = []
+        messages = []
+        for group, message, parser in self._updateMessages:
+            if group & groups:
+                parsers.append(getattr(self, parser))
+                messages.append(message)
+        if self._infoStale:
+            messages.append(self._infoMessage)
+        responses = await self.network.sendRequests(
+            messages, disconnect=False, decode=False, timeout=self.timeout)
+
+        if self._infoStale and responses[len(parsers)]:
+            self._infoStale = False
+            self._parseMachineInfo(responses[len(parsers)])
+            self._storeMachineInfo()
+
+        for parse, response in zip(parsers, responses):
+            if not response:
+                return
+            parse(response)
+
+        now = time.monotonic()
+        for group, _, _ in self._updateMessages:
+            if group & groups:
+                self._updated[group] = now
+
+        if self.history is not None:
+            self._record()
+
+        if self._subscriptions:
+            self._notify()
 
-        for field in dataField:
-            re_result = field.regex.search(response)
-            if re_result:
-                field.value = re_result.group(1)
+        if disconnect:
+            await self.network.release()
+
+    # Single pass parser, 'Key: value' lines to field.
+    _infoKeys = {
+        b'Machine Type': _machine_type,
+        b'Machine Name': _machine_name,
+        b'Firmware': _firmware,
+        b'SN': _machine_SN,
+        b'Tool Count': _extruder_count,
+        b'Mac Address': _mac_address,
+    }
+    # Machine info kept by MachineInfoCache, by name.
+    _cachedFields = {
+        "machine_type": _machine_type,
+        "machine_name": _machine_name,
+        "firmware": _firmware,
+        "serial": _machine_SN,
+        "max_x": _maxX,
+        "max_y": _maxY,
+        "max_z": _maxZ,
+        "extruder_count": _extruder_count,
+        "mac_address": _mac_address,
+    }
+    _statusKeys = {
+        b'MachineStatus': _machine_status,
+        b'MoveMode': _move_mode,
+        b'Status': _status,
+        b'LED': _led,
+        b'CurrentFile': _job_file,
+    }
+    _volumeRegex = re.compile(
+        rb"X\s?:\s?(\d+)\s+Y\s?:\s?(\d+)\s+Z\s?:\s?(\d+)")
+    _tempRegex = re.compile(
+        rb"([TB]\d*)\s?:\s?(-?\d+(?:\.\d+)?)/(-?\d+(?:\.\d+)?)")
+    _positionRegex = re.compile(
+        rb"X\s?:\s?(-?[\d.]+)\s+Y\s?:\s?(-?[\d.]+)\s+Z\s?:\s?(-?[\d.]+)")
+
+    def _parseLines(self, response: bytes, keys: dict):
+        # Fill the fields of keys from 'Key: value' lines.
+        values = self._values
+        for line in response.split(b'\n'):
+            key, sep, value = line.partition(b':')
+            f = keys.get(key.strip()) if sep else None
+            if f is not None:
+                values[f.index] = value.strip().decode('utf8', 'ignore')
+
+    def _loadMachineInfo(self) -> bool:
+        # Fill machine info from the cache, True if it was there.
+        if self.cache is None:
+            return False
+        info = self.cache.find(
+            serial=self._machine_SN,
+            mac=self._mac_address,
+            ip=self.network.ip
+        )
+        if not info or self._machine_SN not in (None, info.get("serial")):
+            return False
+        for name, f in self._cachedFields.items():
+            if info.get(name) is not None:
+                self._values[f.index] = info[name]
+        return True
 
-        # Update temperatures.
-        """
-        'CMD M105 Received.\r\nT0:22/0 B:14/0\r\nok\r\n'
-        """
-        response = await self.network.sendTempRequest(disconnect=False)
-        if not response:
+    def _storeMachineInfo(self):
+        if self.cache is None:
             return
-
-        re_result = self._extruder_temp.regex.search(response)
+        info = {
+            name: self._values[f.index]
+            for name, f in self._cachedFields.items()
+        }
+        if self.cache.store(info, self.network.ip):
+            self.cache.saveLater()
+
+    def _parseMachineInfo(self, response: typing.Union[bytes, str]):
+        # M115
+        if type(response) is str:
+            response = response.encode()
+        self._parseLines(response, self._infoKeys)
+
+        re_result = self._volumeRegex.search(response)
         if re_result:
-            name = re_result.group(1)
-            now = re_result.group(2)
-            target = re_result.group(3)
-            t = temperatures(name, now, target)
-            self.extruder_tools.add(t)
-
-        re_result = self._bed_temp.regex.search(response)
+            self._maxX = re_result.group(1).decode()
+            self._maxY = re_result.group(2).decode()
+            self._maxZ = re_result.group(3).decode()
+
+    def _parseStatus(self, response: typing.Union[bytes, str]):
+        # M119
+        if type(response) is str:
+            response = response.encode()
+        self._parseLines(response, self._statusKeys)
+
+    def _parseTemperature(self, response: typing.Union[bytes, str]):
+        # M105, 'T0:104.5/225.0 T1:0.0/0.0 B:51.3/50.0'
+        if type(response) is str:
+            response = response.encode()
+        for name, now, target in self._tempRegex.findall(response):
+            if name[:1] == b'B':
+                tools = self.bed_tools
+            else:
+                tools = self.extruder_tools
+            tools.set(name.decode(), now, target)
+
+    def _parseProgress(self, response: typing.Union[bytes, str]):
+        # M27, 'SD printing byte 11/100' and 'Layer: 44/419'
+        if type(response) is str:
+            response = response.encode()
+        for line in response.split(b'\n'):
+            if line.startswith(b'SD printing byte'):
+                self._print_percent = \
+                    line[16:].split(b'/')[0].strip().decode()
+            elif line.startswith(b'Layer:'):
+                layer, _, total = line[6:].strip().partition(b'/')
+                self._print_layer = layer.decode()
+                self._job_layers = total.decode()
+
+    def _parsePosition(self, response: typing.Union[bytes, str]):
+        # M114, 'X:19.3861 Y:54.3 Z:194.44 A:0 B:0'
+        if type(response) is str:
+            response = response.encode()
+        re_result = self._positionRegex.search(response)
         if re_result:
-            name = re_result.group(1)
-            now = re_result.group(2)
-            target = re_result.group(3)
-            t = temperatures(name, now, target)
-            self.bed_tools.add(t)
-            # self._bed_temp.value = re_result.group(2)
-            # self._bed_target_temp.value = re_result.group(3)
+            self._position_x = re_result.group(1).decode()
+            self._position_y = re_result.group(2).decode()
+            self._position_z = re_result.group(3).decode()
+
+    def snapshot(self) -> dict:
+        """Current values by name, as compared by watch()."""
+        values = {
+            "machine_status": self._machine_status,
+            "move_mode": self._move_mode,
+            "status": self._status,
+            "led": self._led,
+            "job_file": self._job_file,
+            "print_percent": self._print_percent,
+            "print_layer": self._print_layer,
+            "job_layers": self._job_layers,
+        }
+        for tools in (self.extruder_tools, self.bed_tools):
+            for tool in tools:
+                values[TEMPERATURE + tool.name] = tool.now
+                values["target." + tool.name] = tool.target
+        return values
+
+    def subscribe(self, subscription: Subscription):
+        """Send the changes of every update to subscription."""
+        subscription.baseline(self, self.snapshot())
+        self._subscriptions.append(subscription)
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    async def watch(
+        self,
+        deadband: float = 1.0,
+        maxsize: int = 100,
+        policy: str = COALESCE,
+        interval: float = None
+    ):
+        """Yield the values that change, see Subscription.
+
+        Changes come from update() calls made elsewhere, or pass
+        interval to poll the printer while watching.
+
+        Example:
+            async for change in myPrinter.watch(interval=5):
+                print(f"{change.name}: {change.old} -> {change.new}")
 
-        # Update print progress.
-        """
-        'CMD M27 Received.\r\nSD printing byte 0/100\r\nok\r\n'
+        Args:
+            deadband (float): Ignore temperature moves smaller than this.
+            maxsize (int): Max queued changes for a slow consumer.
+            policy (str): COALESCE or DROP_OLDEST when the queue is full.
+            interval (float, optional): Seconds between own updates.
         """
-        response = await self.network.sendProgressRequest(disconnect=False)
-        if not response:
-            return
+        subscription = Subscription(deadband, maxsize, policy)
+        self.subscribe(subscription)
+        poller = None
+        if interval:
+            poller = asyncio.ensure_future(self._watchPoll(interval))
+        try:
+            async for change in subscription:
+                yield change
+        finally:
+            self.unsubscribe(subscription)
+            subscription.close()
+            if poller is not None:
+                poller.cancel()
+
+    async def _watchPoll(self, interval: float):
+        while True:
+            try:
+                await self.update()
+            except (ConnectionError, TimeoutError) as e:
+                LOG.debug("Watch update failed: %s", e)
+            await asyncio.sleep(interval)
+
+    def _notify(self):
+        snapshot = self.snapshot()
+        for subscription in self._subscriptions:
+            subscription.offer(self, snapshot)
+
+    def _record(self):
+        # Add the current values to the telemetry history.
+        extruder = self.extruder_tools.get()
+        bed = self.bed_tools.get()
+        self.history.append(
+            time.time(),
+            extruder.now if extruder else None,
+            extruder.target if extruder else None,
+            bed.now if bed else None,
+            bed.target if bed else None,
+            _number(self._print_percent),
+            _number(self._print_layer),
+        )
+
+    @contextlib.asynccontextmanager
+    async def control(self, timeout: float = 60):
+        """Hold control of the printer for a batch of commands.
+
+        Example:
+            async with myPrinter.control():
+                await myPrinter.setLed(False)
+                await myPrinter.network.sendPrintRequest('My Box.gx')
 
-        # Print percent.
-        re_result = self._print_percent.regex.search(response)
-        if re_result:
-            self._print_percent.value = re_result.group(1)
+        Args:
+            timeout (float): Release control after timeout seconds.
 
-        # Print layer and total layer.
-        re_result = self._print_layer.regex.search(response)
-        if re_result:
-            self._print_layer.value = re_result.group(1)
-            self._job_layers.value = re_result.group(2)
+        Raises:
+            ControlError: The printer refused control.
+        """
+        if not self.connected:
+            LOG.info("Machine is not connected")
+            await self.connect()
 
-        if disconnect:
-            await self.network.disconnect()
+        async with self.network.control(timeout):
+            self.connected = ConnectionStatus.CONTROL
+            try:
+                yield self
+            finally:
+                self.connected = ConnectionStatus.CONNECTED
 
     async def setLed(self, state: bool, disconnect=True):
         """Set LED state.
@@ -341,7 +751,7 @@ class Printer(object):
         if not response:
             return
         
-        self._led.value = "1" if state else "0"
+        self._led = "1" if state else "0"
         
         if disconnect:
-            await self.network.disconnect()
+            await self.network.release()
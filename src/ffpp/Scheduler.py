@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import logging
+import random
+import time
+import typing
+
+from .Fleet import Fleet
+from .Printer import Printer
+
+LOG = logging.getLogger(__name__)
+
+
+class _PollState(object):
+    __slots__ = ("interval", "temps", "due")
+
+    def __init__(self):
+        self.interval = None
+        self.temps = None
+        self.due = 0.0
+
+
+class PollScheduler(object):
+    """ Poll each printer of a fleet at its own pace.
+
+    The next poll of a printer is picked from its last state:
+        heating      temperature far from target or changing fast.
+        printing     BUILDING_FROM_SD or MOVING, finishing when the
+                     print is almost done.
+        idle         READY, the interval doubles every poll up to idle.
+    A printer that fails to update backs off like an idle printer.
+    Every interval is spread by +- jitter to avoid synchronized bursts.
+
+    Example:
+        scheduler = PollScheduler(fleet, printing=5, idle=120)
+        await scheduler.run()
+    """
+
+    def __init__(
+        self,
+        fleet: Fleet,
+        heating: float = 2,
+        printing: float = 5,
+        finishing: float = 2,
+        idle: float = 60,
+        jitter: float = 0.1,
+        temp_margin: float = 2,
+        finishing_percent: int = 95
+    ):
+        self.fleet = fleet
+        self.heating = heating
+        self.printing = printing
+        self.finishing = finishing
+        self.idle = idle
+        self.jitter = jitter
+        self.temp_margin = temp_margin
+        self.finishing_percent = finishing_percent
+        self._state: typing.Dict[str, _PollState] = {}
+        self._queue: typing.List[typing.Tuple[float, str]] = []
+        self._wakeup: typing.Optional[asyncio.Event] = None
+
+    def nextInterval(self, printer: Printer, ok: bool = True) -> float:
+        """Seconds until the next poll of printer, without jitter.
+
+        Args:
+            printer (Printer): Printer that was just updated.
+            ok (bool, optional): False if the update failed.
+
+        Returns:
+            [float]: Interval in seconds.
+        """
+        state = self._state.setdefault(printer.network.ip, _PollState())
+        last_temps, state.temps = state.temps, self._temps(printer)
+
+        if not ok:
+            return self._backoff(state)
+
+        if self._isHeating(state.temps, last_temps):
+            interval = self.heating
+        elif printer.machine_status == "BUILDING_FROM_SD" \
+                or printer.move_mode == "MOVING":
+            interval = self.printing
+            try:
+                if int(printer.print_percent) >= self.finishing_percent:
+                    interval = self.finishing
+            except (TypeError, ValueError):
+                pass
+        else:
+            return self._backoff(state)
+
+        state.interval = interval
+        return interval
+
+    def schedule(self, printer: Printer, delay: float):
+        """Poll printer again in delay seconds, with jitter."""
+        ip = printer.network.ip
+        state = self._state.setdefault(ip, _PollState())
+        state.due = time.monotonic() + delay * random.uniform(
+            1 - self.jitter, 1 + self.jitter)
+        heapq.heappush(self._queue, (state.due, ip))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def due(self, ip: str) -> typing.Optional[float]:
+        """Monotonic time of the next poll of a printer."""
+        state = self._state.get(ip)
+        return state.due if state else None
+
+    async def run(self):
+        """Poll the fleet until cancelled."""
+        self._wakeup = asyncio.Event()
+        self.fleet.added_listeners.append(self._printerAdded)
+        tasks = set()
+        try:
+            while True:
+                self._addNewPrinters()
+                now = time.monotonic()
+                while self._queue and self._queue[0][0] <= now:
+                    due, ip = heapq.heappop(self._queue)
+                    printer = self.fleet.get(ip)
+                    state = self._state.get(ip)
+                    if state is None or state.due != due:
+                        continue  # Rescheduled.
+                    if printer is None:
+                        # Removed, scheduled again if it is added back.
+                        del self._state[ip]
+                        continue
+                    task = asyncio.ensure_future(self._poll(printer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+                delay = self._queue[0][0] - now if self._queue else self.idle
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.fleet.added_listeners.remove(self._printerAdded)
+            for task in tasks:
+                task.cancel()
+
+    def _printerAdded(self, printer: Printer):
+        # Schedule it now instead of after the next due poll.
+        self._wakeup.set()
+
+    async def _poll(self, printer: Printer):
+        ok = await self.fleet.updatePrinter(printer)
+        self.schedule(printer, self.nextInterval(printer, ok))
+
+    def _addNewPrinters(self):
+        for printer in self.fleet:
+            if printer.network.ip not in self._state:
+                # Spread the first polls over the first interval.
+                self.schedule(printer, random.uniform(0, self.printing))
+
+    def _backoff(self, state: _PollState) -> float:
+        if state.interval is None:
+            state.interval = self.printing
+        else:
+            state.interval = min(self.idle, state.interval * 2)
+        return state.interval
+
+    def _isHeating(self, temps, last_temps) -> bool:
+        for i, (now, target) in enumerate(temps):
+            if target > 0 and abs(target - now) > self.temp_margin:
+                return True
+            if last_temps and i < len(last_temps):
+                if abs(now - last_temps[i][0]) > self.temp_margin:
+                    return True
+        return False
+
+    @staticmethod
+    def _temps(printer: Printer):
+        return [
+            (tool.now, tool.target)
+            for tools in (printer.extruder_tools, printer.bed_tools)
+            for tool in tools
+        ]
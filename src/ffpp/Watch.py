@@ -0,0 +1,125 @@
+import asyncio
+import collections
+import time
+import typing
+
+# Policies when a subscriber queue is full.
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+
+# Snapshot names of measured temperatures, compared with the deadband.
+TEMPERATURE = "temperature."
+
+
+class Change(typing.NamedTuple):
+    """ One value of a printer that changed."""
+    printer: typing.Any
+    name: str
+    old: typing.Any
+    new: typing.Any
+    timestamp: float
+
+
+class Subscription(object):
+    """ Bounded queue of changes for one consumer.
+
+    A value is a change when it differs from the last one this
+    subscriber got, measured temperatures only when they moved more
+    than deadband degrees. When the queue is full the oldest change is
+    dropped; with the coalesce policy a new change of a value that is
+    still queued replaces it first, keeping the old value of the queued
+    one, so a slow consumer sees the net change.
+
+    Example:
+        async for change in myPrinter.watch(deadband=2):
+            print(change.name, change.old, change.new)
+    """
+
+    def __init__(
+        self,
+        deadband: float = 1.0,
+        maxsize: int = 100,
+        policy: str = COALESCE
+    ):
+        if policy not in (DROP_OLDEST, COALESCE):
+            raise ValueError(f"Unknown policy {policy}")
+        self.deadband = deadband
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        self._last: typing.Dict[int, dict] = {}
+        self._queue: collections.OrderedDict = collections.OrderedDict()
+        self._seq = 0
+        self._event: typing.Optional[asyncio.Event] = None
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Change:
+        change = await self.get()
+        if change is None:
+            raise StopAsyncIteration
+        return change
+
+    def baseline(self, printer, snapshot: dict):
+        """Start from snapshot without reporting it as changes."""
+        self._last[id(printer)] = dict(snapshot)
+
+    def offer(self, printer, snapshot: dict):
+        """Queue the changes between snapshot and the last values."""
+        last = self._last.setdefault(id(printer), {})
+        now = time.time()
+        for name, new in snapshot.items():
+            old = last.get(name)
+            if new == old:
+                continue
+            if name.startswith(TEMPERATURE) and old is not None \
+                    and new is not None and abs(new - old) < self.deadband:
+                continue
+            last[name] = new
+            self._put(Change(printer, name, old, new, now))
+
+    async def get(self) -> typing.Optional[Change]:
+        """Wait for the next change, None when closed."""
+        if self._event is None:
+            self._event = asyncio.Event()
+        while not self._queue:
+            if self.closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        return self._queue.popitem(last=False)[1]
+
+    def close(self):
+        self.closed = True
+        if self._event is not None:
+            self._event.set()
+
+    def _put(self, change: Change):
+        if self.policy == COALESCE:
+            key = (id(change.printer), change.name)
+            queued = self._queue.get(key)
+            if queued is not None:
+                if queued.old == change.new:
+                    del self._queue[key]  # Back where it was.
+                else:
+                    self._queue[key] = change._replace(old=queued.old)
+                    self._wake()
+                return
+        else:
+            key = self._seq
+            self._seq += 1
+
+        self._queue[key] = change
+        while len(self._queue) > self.maxsize:
+            self._queue.popitem(last=False)
+            self.dropped += 1
+        self._wake()
+
+    def _wake(self):
+        if self._event is not None:
+            self._event.set()
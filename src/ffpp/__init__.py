@@ -7,5 +7,9 @@ import logging
 
 from . import Printer  # noqa
 from . import Discovery  # noqa
+from . import Fleet  # noqa
+from . import Scheduler  # noqa
+from . import Emulator  # noqa
+from . import Cache  # noqa
 
 LOG = logging.getLogger(__name__)
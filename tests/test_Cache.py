@@ -0,0 +1,122 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.ffpp.Cache import MachineInfoCache
+
+INFO = {
+    "machine_type": "Flashforge Adventurer 4",
+    "machine_name": "Adventurer4",
+    "firmware": "v2.0.9",
+    "serial": "SNADVA9501174",
+    "mac_address": "88:A9:A7:93:86:F8",
+}
+
+
+class test_MachineInfoCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "machines.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_storeAndSave_loadedByNewCache(self):
+        # Arrange
+        cache = MachineInfoCache(self.path)
+
+        # Act
+        changed = cache.store(INFO, "192.168.0.2")
+        cache.save()
+        loaded = MachineInfoCache(self.path)
+
+        # Assert
+        self.assertTrue(changed)
+        self.assertDictEqual(loaded.get("SNADVA9501174"), INFO)
+        self.assertDictEqual(loaded.find(mac="88:A9:A7:93:86:F8"), INFO)
+        self.assertDictEqual(loaded.find(ip="192.168.0.2"), INFO)
+
+    def test_storeSame_unchanged(self):
+        cache = MachineInfoCache(self.path)
+        cache.store(INFO, "192.168.0.2")
+
+        self.assertFalse(cache.store(INFO, "192.168.0.2"))
+
+    def test_newAddress_keptNewestFirst(self):
+        # Arrange
+        cache = MachineInfoCache(self.path)
+
+        # Act
+        for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4",
+                   "10.0.0.5", "10.0.0.3"):
+            cache.store(INFO, ip)
+
+        # Assert
+        self.assertListEqual(
+            cache.ips("SNADVA9501174"),
+            ["10.0.0.3", "10.0.0.5", "10.0.0.4", "10.0.0.2"])
+        self.assertIsNone(cache.find(ip="10.0.0.1"))
+
+    def test_brokenFile_emptyCache(self):
+        with open(self.path, 'w') as f:
+            f.write("{not json")
+
+        with self.assertLogs('src.ffpp.Cache', 'WARNING'):
+            cache = MachineInfoCache(self.path)
+
+        self.assertEqual(len(cache), 0)
+
+    async def test_saveLaterManyPrinters_savedOnce(self):
+        # Arrange
+        cache = MachineInfoCache(self.path, save_delay=0.01)
+
+        # Act
+        with mock.patch.object(cache, 'save', wraps=cache.save) as save:
+            for i in range(10):
+                cache.store(dict(INFO, serial=f"SN{i}"), f"10.0.0.{i}")
+                cache.saveLater()
+            saved = os.path.exists(self.path)
+            await asyncio.sleep(0.05)
+
+        # Assert
+        self.assertFalse(saved)
+        save.assert_called_once()
+        self.assertEqual(len(MachineInfoCache(self.path)), 10)
+
+    async def test_flush_savedNow(self):
+        # Arrange
+        cache = MachineInfoCache(self.path, save_delay=60)
+        cache.store(INFO, "192.168.0.2")
+        cache.saveLater()
+
+        # Act
+        cache.flush()
+
+        # Assert
+        self.assertIsNone(cache._pending)
+        self.assertIn("SNADVA9501174", MachineInfoCache(self.path))
+
+    def test_loopClosedBeforeSave_savedByNextCall(self):
+        # Arrange
+        cache = MachineInfoCache(self.path, save_delay=60)
+
+        async def store(ip):
+            cache.store(INFO, ip)
+            cache.saveLater()
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(store("192.168.0.2"))
+        loop.close()
+
+        # Act
+        cache.store(INFO, "192.168.0.3")
+        cache.saveLater()
+
+        # Assert
+        self.assertIsNone(cache._pending)
+        self.assertListEqual(
+            MachineInfoCache(self.path).ips("SNADVA9501174"),
+            ["192.168.0.3", "192.168.0.2"])
@@ -0,0 +1,227 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from src.ffpp.Discovery import (
+    DiscoveredPrinter,
+    DiscoveryService,
+    find_host_ips,
+    getPrinters,
+    iterPrinters,
+    parseReply,
+    sweepPrinters
+)
+from src.ffpp.Emulator import PrinterEmulator, startDiscoveryResponder
+
+
+class test_DiscoveryEmulated(unittest.IsolatedAsyncioTestCase):
+    """ Discover emulated printers over loopback multicast."""
+
+    async def asyncSetUp(self):
+        self.emulator = await PrinterEmulator().start('127.0.0.1', 0)
+        try:
+            self.responder, _ = await startDiscoveryResponder(
+                [self.emulator], interface='127.0.0.1')
+        except OSError as e:
+            await self.emulator.close()
+            self.skipTest(f"Unable to listen for discovery: {e}")
+
+    async def asyncTearDown(self):
+        self.responder.close()
+        await self.emulator.close()
+
+    async def test_iterPrinters_yieldBeforeDeadline(self):
+        # Arrange
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        printers = []
+
+        # Act
+        async for printer in iterPrinters(
+            expected=["Adventurer4"], deadline=5, host_ip='127.0.0.1'
+        ):
+            printers.append(printer)
+
+        # Assert
+        self.assertListEqual(printers, [("Adventurer4", "127.0.0.1")])
+        self.assertLess(loop.time() - start, 1)
+
+    async def test_iterPrinters_identityFromReply(self):
+        # Act
+        async for printer in iterPrinters(
+            expected=1, deadline=5, host_ip='127.0.0.1'
+        ):
+            break
+
+        # Assert
+        self.assertIsInstance(printer, DiscoveredPrinter)
+        self.assertEqual(printer.serial, "SNADVA9501174")
+        self.assertEqual(printer.port, self.emulator.port)
+
+    async def test_concurrentSearches_shareEndpoint(self):
+        # Arrange
+        loop = asyncio.get_running_loop()
+
+        async def search():
+            return await getPrinters(
+                loop, limit=1, timeout=5, host_ips=['127.0.0.1'])
+
+        # Act
+        first, second = await asyncio.gather(search(), search())
+
+        # Assert
+        self.assertListEqual(first, [("Adventurer4", "127.0.0.1")])
+        self.assertListEqual(second, [("Adventurer4", "127.0.0.1")])
+
+    def test_findHostIps_addresses(self):
+        ips = find_host_ips()
+        self.assertTrue(len(ips) > 0)
+        for ip in ips:
+            self.assertEqual(len(ip.split('.')), 4)
+
+
+class test_ParseReply(unittest.TestCase):
+
+    def test_legacyReply_nameOnly(self):
+        printer = parseReply(
+            b'Adventurer4'.ljust(128, b'\x00'), '192.168.0.2')
+
+        self.assertEqual(printer, ("Adventurer4", "192.168.0.2"))
+        self.assertIsNone(printer.serial)
+        self.assertIsNone(printer.port)
+        self.assertIsNone(printer.model)
+
+    def test_layoutReply_portAndSerial(self):
+        data = (
+            b'Adventurer5M'.ljust(132, b'\x00')
+            + b'\x22\xc3' + bytes(10)
+            + b'SNMOMC9900728'.ljust(130, b'\x00')
+        )
+
+        name, ip = printer = parseReply(data, '192.168.0.2')
+
+        self.assertEqual(name, "Adventurer5M")
+        self.assertEqual(printer.port, 8899)
+        self.assertEqual(printer.serial, "SNMOMC9900728")
+        self.assertEqual(printer.raw, data)
+
+    def test_otherReply_textAfterName(self):
+        data = (
+            b'Finder\x00\x00\x00Flashforge Finder\x00\x01'
+            b'SNFFF2900123\x00\x00'
+        )
+
+        printer = parseReply(data, '192.168.0.2')
+
+        self.assertEqual(printer.name, "Finder")
+        self.assertEqual(printer.model, "Flashforge Finder")
+        self.assertEqual(printer.serial, "SNFFF2900123")
+
+
+class test_SweepPrinters(unittest.IsolatedAsyncioTestCase):
+
+    async def test_sweepSubnet_findEmulator(self):
+        # Arrange
+        async with PrinterEmulator(name="Swept") as emulator:
+
+            # Act
+            printers = await sweepPrinters(
+                '127.0.0.0/28', port=emulator.port, concurrency=8)
+
+        # Assert
+        self.assertListEqual(printers, [("Swept", "127.0.0.1")])
+        self.assertEqual(printers[0].serial, "SNADVA9501174")
+        self.assertEqual(printers[0].model, "Flashforge Adventurer 4")
+
+    async def test_sweepSubnet_ignoreOtherServices(self):
+        # Arrange
+        async def handle(reader, writer):
+            writer.write(b'HTTP/1.0 400 Bad Request\r\n\r\n')
+            writer.close()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+
+        # Act
+        printers = await sweepPrinters(
+            '127.0.0.0/30', port=port, confirm_timeout=0.5)
+        server.close()
+        await server.wait_closed()
+
+        # Assert
+        self.assertListEqual(printers, [])
+
+    async def test_sweepSilentService_oneConnectionClosed(self):
+        # Arrange
+        connections = []
+        accepted = 0
+
+        async def handle(reader, writer):
+            nonlocal accepted
+            accepted += 1
+            connections.append(writer)
+            await reader.read()  # Never answers, returns once closed.
+            connections.remove(writer)
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+
+        # Act
+        printers = await sweepPrinters(
+            '127.0.0.1/32', port=port, confirm_timeout=0.2)
+        await asyncio.sleep(0.05)
+        server.close()
+        await server.wait_closed()
+
+        # Assert
+        self.assertListEqual(printers, [])
+        self.assertEqual(accepted, 1)
+        self.assertListEqual(connections, [])
+
+
+class test_DiscoveryService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.patch_get = mock.patch('src.ffpp.Discovery.getPrinters')
+        self.mock_get = self.patch_get.start()
+        self.mock_get.return_value = [("Adventurer4", "10.0.0.1")]
+
+    def tearDown(self):
+        self.patch_get.stop()
+
+    async def test_start_nonBlockingCache(self):
+        # Arrange
+        appeared = []
+        service = DiscoveryService(
+            interval=0.01, on_appeared=lambda *p: appeared.append(p))
+
+        # Act
+        await service.start()
+        before = service.printers
+        await service.wait()
+        await asyncio.sleep(0.05)
+        await service.stop()
+
+        # Assert
+        self.assertListEqual(before, [])
+        self.assertListEqual(service.printers, [("Adventurer4", "10.0.0.1")])
+        self.assertListEqual(appeared, [("Adventurer4", "10.0.0.1")])
+        self.assertGreater(self.mock_get.await_count, 1)
+        self.assertFalse(service.running)
+
+    async def test_ttl_printerDisappears(self):
+        # Arrange
+        disappeared = []
+        service = DiscoveryService(
+            ttl=10, on_disappeared=lambda *p: disappeared.append(p))
+        service.seen([("Adventurer4", "10.0.0.1")])
+        self.mock_get.return_value = []
+
+        # Act
+        with mock.patch('src.ffpp.Discovery.time.time') as mock_time:
+            mock_time.return_value = service.lastSeen("10.0.0.1") + 11
+            await service.probe()
+
+        # Assert
+        self.assertListEqual(service.printers, [])
+        self.assertListEqual(disappeared, [("Adventurer4", "10.0.0.1")])
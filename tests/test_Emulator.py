@@ -0,0 +1,129 @@
+import asyncio
+import socket
+import unittest
+
+from src.ffpp.Emulator import (
+    EmulatorFarm,
+    PrinterEmulator,
+    startDiscoveryResponder
+)
+from src.ffpp.Network import ConnectionPool, Network
+from src.ffpp.Printer import Printer
+
+
+class test_PrinterEmulator(unittest.IsolatedAsyncioTestCase):
+    """ Run the real Printer and Network against the emulator."""
+
+    async def asyncSetUp(self):
+        self.emulator = await PrinterEmulator().start('127.0.0.1', 0)
+
+    async def asyncTearDown(self):
+        await self.emulator.close()
+
+    async def test_connectPrinter_machineInfo(self):
+        # Arrange
+        printer = Printer(self.emulator.host, self.emulator.port)
+
+        # Act
+        await printer.connect()
+
+        # Assert
+        self.assertEqual(printer.machine_type, "Flashforge Adventurer 4")
+        self.assertEqual(printer.machine_name, "Adventurer4")
+        self.assertEqual(printer.serial, "SNADVA9501174")
+        self.assertEqual(printer.mac_address, "88:A9:A7:93:86:F8")
+        self.assertEqual(printer.machine_status, "READY")
+        self.assertEqual(printer.extruder_tools.get().now, 22)
+        self.assertEqual(printer.print_percent, "0")
+
+    async def test_pooledPrinters_oneConnection(self):
+        # Arrange
+        pool = ConnectionPool()
+        printers = [
+            Printer(self.emulator.host, self.emulator.port, pool=pool)
+            for _ in range(5)]
+
+        # Act
+        await asyncio.gather(*[p.update() for p in printers])
+        await printers[0].connect()
+
+        # Assert
+        self.assertEqual(self.emulator.connections, 1)
+        for printer in printers:
+            self.assertEqual(printer.machine_status, "READY")
+        await pool.close_all()
+
+    async def test_startPrint_building(self):
+        # Arrange
+        net = Network(self.emulator.host, self.emulator.port)
+        printer = Printer(self.emulator.host, self.emulator.port)
+
+        # Act
+        files = await net.sendGetFileNames()
+        response = await net.sendPrintRequest("My Box.gx")
+        await printer.update()
+
+        # Assert
+        self.assertListEqual(files, ["/data/My Box.gx"])
+        self.assertTrue("File selected" in response)
+        self.assertEqual(printer.machine_status, "BUILDING_FROM_SD")
+        self.assertEqual(printer.job_file, "My Box.gx")
+        self.assertEqual(printer.extruder_tools.get().target, 210)
+
+    async def test_abortPrint_ready(self):
+        # Arrange
+        net = Network(self.emulator.host, self.emulator.port)
+        await net.sendPrintRequest("My Box.gx")
+
+        # Act
+        response = await asyncio.wait_for(net.sendAbortRequest(), 2)
+
+        # Assert
+        self.assertEqual(response, "CMD M26 Received.\r\n")
+        self.assertEqual(self.emulator.machine_status, "READY")
+
+    async def test_twoClients_oneControl(self):
+        # Arrange
+        net1 = Network(self.emulator.host, self.emulator.port)
+        net2 = Network(self.emulator.host, self.emulator.port)
+
+        # Act
+        async with net1.control():
+            response = await net2.sendPauseRequest()
+        response2 = await net2.sendPauseRequest()
+
+        # Assert
+        self.assertEqual(response, "")
+        self.assertTrue("CMD M25 Received" in response2)
+
+    async def test_discoveryProbe_nameReply(self):
+        # Arrange
+        transport, _ = await startDiscoveryResponder(
+            [self.emulator], host='127.0.0.1', port=0, group=None)
+        port = transport.get_extra_info('socket').getsockname()[1]
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.setblocking(False)
+        loop = asyncio.get_running_loop()
+
+        # Act
+        try:
+            sock.sendto(b"Hello World!", ('127.0.0.1', port))
+            data = await asyncio.wait_for(loop.sock_recv(sock, 1024), 1)
+        finally:
+            sock.close()
+            transport.close()
+
+        # Assert
+        self.assertEqual(data[:data.find(b'\x00')], b"Adventurer4")
+
+    async def test_farm_manyPrinters(self):
+        # Arrange
+        async with EmulatorFarm(20) as farm:
+            printers = [Printer(e.host, e.port) for e in farm]
+
+            # Act
+            await asyncio.gather(*[p.connect() for p in printers])
+
+        # Assert
+        self.assertEqual(len({p.serial for p in printers}), 20)
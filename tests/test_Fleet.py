@@ -0,0 +1,120 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from src.ffpp.Fleet import Fleet
+from src.ffpp.Printer import UpdateGroup
+
+
+def mockPrinter(ip, update=None):
+    printer = mock.Mock()
+    printer.network.ip = ip
+    printer.network.disconnect = mock.AsyncMock()
+    printer.network.keep_alive = False
+    printer.network.isBusy.return_value = False
+    printer.update = mock.AsyncMock(side_effect=update)
+    return printer
+
+
+class test_FleetClass(unittest.IsolatedAsyncioTestCase):
+
+    async def test_updateAll_allUpdated(self):
+        # Arrange
+        printers = [mockPrinter(f"10.0.0.{i}") for i in range(10)]
+        fleet = Fleet(printers)
+
+        # Act
+        stats = await fleet.update()
+
+        # Assert
+        self.assertEqual(len(fleet), 10)
+        self.assertEqual(stats.updated, 10)
+        for printer in printers:
+            printer.update.assert_awaited_once()
+
+    async def test_concurrencyLimit_neverExceeded(self):
+        # Arrange
+        running = 0
+        peak = 0
+
+        async def update():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        fleet = Fleet(
+            [mockPrinter(f"10.0.0.{i}", update) for i in range(20)],
+            concurrency=4
+        )
+
+        # Act
+        stats = await fleet.update()
+
+        # Assert
+        self.assertEqual(stats.updated, 20)
+        self.assertEqual(peak, 4)
+
+    async def test_deadPrinters_isolated(self):
+        # Arrange
+        async def hang():
+            await asyncio.sleep(10)
+
+        ok = mockPrinter("10.0.0.1")
+        slow = mockPrinter("10.0.0.2", hang)
+        broken = mockPrinter("10.0.0.3", ConnectionError("reset"))
+        fleet = Fleet([ok, slow, broken], deadline=0.05)
+
+        # Act
+        stats = await fleet.update()
+
+        # Assert
+        self.assertEqual(stats.updated, 1)
+        self.assertEqual(stats.timed_out, 1)
+        self.assertEqual(stats.failed, 1)
+        self.assertIn("10.0.0.2", stats.errors)
+        self.assertIsInstance(stats.errors["10.0.0.3"], ConnectionError)
+        slow.network.disconnect.assert_awaited_once()
+        self.assertLess(stats.duration, 1)
+
+    async def test_timedOutInUse_leftConnected(self):
+        # Arrange
+        async def hang():
+            await asyncio.sleep(10)
+
+        kept = mockPrinter("10.0.0.1", hang)
+        kept.network.keep_alive = True
+        busy = mockPrinter("10.0.0.2", hang)
+        busy.network.isBusy.return_value = True
+        fleet = Fleet([kept, busy], deadline=0.05)
+
+        # Act
+        stats = await fleet.update()
+
+        # Assert
+        self.assertEqual(stats.timed_out, 2)
+        kept.network.disconnect.assert_not_awaited()
+        busy.network.disconnect.assert_not_awaited()
+
+    async def test_runIntervals_groupsByRate(self):
+        # Arrange
+        printer = mockPrinter("10.0.0.1")
+        fleet = Fleet([printer])
+        intervals = {
+            UpdateGroup.TEMPERATURE: 0.05,
+            UpdateGroup.STATUS | UpdateGroup.PROGRESS: 10,
+        }
+
+        # Act
+        task = asyncio.ensure_future(fleet.run(intervals=intervals))
+        await asyncio.sleep(0.12)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        # Assert
+        groups = [c.kwargs["groups"] for c in printer.update.await_args_list]
+        self.assertGreaterEqual(len(groups), 2)
+        self.assertEqual(groups[0], UpdateGroup.DEFAULT)
+        for group in groups[1:]:
+            self.assertEqual(group, UpdateGroup.TEMPERATURE)
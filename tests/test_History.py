@@ -0,0 +1,56 @@
+import unittest
+
+from src.ffpp.History import TelemetryHistory
+
+
+class test_TelemetryHistory(unittest.TestCase):
+
+    def test_append_wrapsAround(self):
+        # Arrange
+        history = TelemetryHistory(3)
+
+        # Act
+        for i in range(5):
+            history.append(100 + i, extruder=20 + i)
+
+        # Assert
+        self.assertEqual(len(history), 3)
+        self.assertListEqual(history.values('time'), [102, 103, 104])
+        self.assertListEqual(history.values('extruder'), [22, 23, 24])
+        self.assertEqual(history.latest()['extruder'], 24)
+
+    def test_buffers_zeroCopy(self):
+        # Arrange
+        history = TelemetryHistory(4)
+        for i in range(6):
+            history.append(i, bed=i)
+
+        # Act
+        older, newer = history.buffers('bed')
+
+        # Assert
+        self.assertEqual(older.format, 'f')
+        self.assertListEqual(older.tolist() + newer.tolist(), [2, 3, 4, 5])
+        history.append(6, bed=60)
+        self.assertEqual(history.buffer('bed')[2], 60)
+
+    def test_window_aggregates(self):
+        # Arrange
+        history = TelemetryHistory(100)
+        for i in range(10):
+            history.append(1000 + i * 5, extruder=20 + i * 10)
+        history.append(1050, extruder=None)
+
+        # Act
+        everything = history.window('extruder')
+        last = history.window('extruder', seconds=10, now=1045)
+
+        # Assert
+        self.assertEqual(everything.count, 10)
+        self.assertEqual(everything.min, 20)
+        self.assertEqual(everything.max, 110)
+        self.assertAlmostEqual(everything.mean, 65)
+        self.assertAlmostEqual(everything.slope, 2)
+        self.assertEqual(last.count, 3)
+        self.assertEqual(last.min, 90)
+        self.assertIsNone(history.window('bed'))
@@ -1,10 +1,26 @@
 import socket
+import struct
 import typing
 import unittest
 from unittest import mock
 import asyncio
 
-from src.ffpp.Network import Network
+from src.ffpp.Network import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CommandTimeoutError,
+    ConnectionPool,
+    ControlError,
+    Network,
+    ResponseFramer
+)
+from src.ffpp.Emulator import PrinterEmulator
+from tests.const_NetworkResponse import (
+    RESPONSE_sendAbortRequest,
+    RESPONSE_sendControlRelease,
+    RESPONSE_sendControlRequestTrue,
+    RESPONSE_sendGetFileNames
+)
 
 PRINTER_IP = "192.168.20.41"
 PRINTER_PORT = 8899
@@ -64,6 +80,782 @@ class TestNetworkClass(unittest.IsolatedAsyncioTestCase):
         # self.assertFalse(response)
 
 
+class TestResponseFramer(unittest.TestCase):
+    """ Test how the byte stream is split into responses."""
+
+    def test_splitResponse_oneFrame(self):
+        # Arrange
+        framer = ResponseFramer()
+        response = b'CMD M27 Received.\r\nSD printing byte 0/100\r\nok\r\n'
+
+        # Act
+        framer.feed(response[:10])
+        first = framer.next()
+        framer.feed(response[10:-2])
+        second = framer.next()
+        framer.feed(response[-2:])
+        third = framer.next()
+
+        # Assert
+        self.assertIsNone(first)
+        self.assertIsNone(second)
+        self.assertEqual(third, response)
+        self.assertEqual(len(framer), 0)
+
+    def test_twoResponses_twoFrames(self):
+        # Arrange
+        framer = ResponseFramer()
+        status = b'CMD M119 Received.\r\nLED: 0\r\nok\r\n'
+        temp = b'CMD M105 Received.\r\nT0:22/0 B:14/0\r\nok\r\n'
+
+        # Act
+        framer.feed(status + temp + b'CMD M27')
+        frames = framer.frames()
+
+        # Assert
+        self.assertListEqual(frames, [status, temp])
+        self.assertEqual(len(framer), len(b'CMD M27'))
+        self.assertEqual(ResponseFramer.command(frames[1]), 'M105')
+
+    def test_fileList_frameWithTrailer(self):
+        # Arrange
+        framer = ResponseFramer()
+        names = [b'/data/My Box.gx', b'/data/Cube.gx']
+        trailer = b'D\xaa\xaa\x00' + len(names).to_bytes(4, 'big')
+        for name in names:
+            trailer += b'::\xa3\xa3' + len(name).to_bytes(4, 'big') + name
+        response = b'CMD M661 Received.\r\nok\r\n' + trailer
+
+        # Act
+        framer.feed(response[:-4])
+        partial = framer.next()
+        framer.feed(response[-4:] + b'CMD M119 Received.\r\nok\r\n')
+        frame = framer.next()
+
+        # Assert
+        self.assertIsNone(partial)
+        self.assertEqual(frame, response)
+        self.assertEqual(
+            framer.next(), b'CMD M119 Received.\r\nok\r\n')
+
+    def test_headerOnlyResponse_endsAtNextHeader(self):
+        # Arrange
+        framer = ResponseFramer()
+        abort = RESPONSE_sendAbortRequest.encode()
+        release = RESPONSE_sendControlRelease.encode()
+
+        # Act
+        framer.feed(abort)
+        first = framer.next()
+        framer.feed(release)
+        second = framer.next()
+
+        # Assert
+        self.assertEqual(first, abort)
+        self.assertEqual(second, release)
+
+    def test_headerOnlyResponseWithOk_okDropped(self):
+        # Arrange
+        framer = ResponseFramer()
+        abort = b'CMD M26 Received.\r\n'
+        status = b'CMD M119 Received.\r\nLED: 0\r\nok\r\n'
+
+        # Act
+        framer.feed(abort + b'ok\r\n' + status)
+        frames = framer.frames()
+
+        # Assert
+        self.assertListEqual(frames, [abort, status])
+
+    def test_missingOk_endsAtNextHeader(self):
+        # Arrange
+        framer = ResponseFramer()
+        first = b'CMD M24 Received.\r\n'
+        second = b'CMD M119 Received.\r\nok\r\n'
+
+        # Act
+        framer.feed(first + second)
+        frames = framer.frames()
+
+        # Assert
+        self.assertListEqual(frames, [first, second])
+
+    def test_fileListWithoutTrailer_frame(self):
+        framer = ResponseFramer()
+        framer.feed(RESPONSE_sendGetFileNames.encode())
+
+        self.assertIsNone(framer.next())
+        self.assertTrue(framer.trailerPending)
+        self.assertEqual(
+            framer.next(final=True), RESPONSE_sendGetFileNames.encode())
+
+    def test_fileListTrailerSplit_oneFrame(self):
+        # Arrange
+        framer = ResponseFramer()
+        header = b'CMD M661 Received.\r\nok\r\n'
+        name = b'/data/My Box.gx'
+        trailer = b'D\xaa\xaa\x00' + struct.pack('>I', 1) \
+            + b'::\xa3\xa3' + struct.pack('>I', len(name)) + name
+        status = b'CMD M119 Received.\r\nLED: 0\r\nok\r\n'
+
+        # Act
+        framer.feed(header)
+        first = framer.next()
+        framer.feed(trailer + status)
+        frames = framer.frames()
+
+        # Assert
+        self.assertIsNone(first)
+        self.assertListEqual(frames, [header + trailer, status])
+
+    def test_fileListWithoutTrailer_endsAtNextHeader(self):
+        # Arrange
+        framer = ResponseFramer()
+        header = b'CMD M661 Received.\r\nok\r\n'
+        status = b'CMD M119 Received.\r\nLED: 0\r\nok\r\n'
+
+        # Act
+        framer.feed(header)
+        first = framer.next()
+        framer.feed(status)
+        frames = framer.frames()
+
+        # Assert
+        self.assertIsNone(first)
+        self.assertListEqual(frames, [header, status])
+
+
+class TestRecordedResponses(unittest.IsolatedAsyncioTestCase):
+    """ Test a local tcp server answering with recorded responses."""
+
+    async def asyncSetUp(self):
+        replies = {
+            b'M601': RESPONSE_sendControlRequestTrue,
+            b'M26': RESPONSE_sendAbortRequest,
+            b'M602': RESPONSE_sendControlRelease,
+            b'M661': RESPONSE_sendGetFileNames,
+        }
+
+        async def handle(reader, writer):
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                writer.write(replies[line[1:].split()[0]].encode())
+                await writer.drain()
+            writer.close()
+
+        self.server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_abortRequest_returns(self):
+        # Arrange
+        net = Network('127.0.0.1', self.port)
+
+        # Act
+        response = await asyncio.wait_for(net.sendAbortRequest(), 2)
+
+        # Assert
+        self.assertEqual(response, RESPONSE_sendAbortRequest)
+
+    async def test_fileListWithoutTrailer_returns(self):
+        # Arrange
+        net = Network('127.0.0.1', self.port)
+
+        # Act
+        names = await asyncio.wait_for(net.sendGetFileNames(), 2)
+
+        # Assert
+        self.assertListEqual(names, [])
+
+
+class TestConnectionPool(unittest.IsolatedAsyncioTestCase):
+    """ Test the connection pool against a local tcp server."""
+
+    async def asyncSetUp(self):
+        self.connections = 0
+
+        async def handle(reader, writer):
+            self.connections += 1
+            while True:
+                data = await reader.read(1024)
+                if not data:
+                    break
+                writer.write(b'CMD M119 Received.\r\nok\r\n')
+                await writer.drain()
+            writer.close()
+
+        self.server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_getSamePrinter_sameNetwork(self):
+        # Arrange
+        pool = ConnectionPool()
+
+        # Act
+        net1 = pool.get('127.0.0.1', self.port)
+        net2 = pool.get('127.0.0.1', self.port)
+
+        # Assert
+        self.assertIs(net1, net2)
+        self.assertTrue(net1.keep_alive)
+        self.assertEqual(len(pool), 1)
+        await pool.close_all()
+
+    async def test_pooledRequests_oneConnection(self):
+        # Arrange
+        pool = ConnectionPool()
+        net = pool.get('127.0.0.1', self.port)
+
+        # Act
+        for _ in range(3):
+            response = await net.sendStatusRequest()
+            self.assertTrue("CMD M119 Received" in response)
+
+        # Assert
+        self.assertEqual(self.connections, 1)
+        self.assertTrue(net.isAlive())
+        await pool.close_all()
+        self.assertIsNone(net.connection)
+        self.assertEqual(len(pool), 0)
+
+    async def test_concurrentConnect_oneConnection(self):
+        # Arrange
+        pool = ConnectionPool()
+        net = pool.get('127.0.0.1', self.port)
+
+        # Act
+        await asyncio.gather(*[net.connect() for _ in range(5)])
+        await net.sendStatusRequest()
+        await net.connect()
+        await asyncio.sleep(0.01)
+
+        # Assert
+        self.assertEqual(self.connections, 1)
+        await pool.close_all()
+
+    async def test_idleConnection_reconnect(self):
+        # Arrange
+        pool = ConnectionPool(idle_timeout=0.01)
+        net = pool.get('127.0.0.1', self.port)
+        await net.sendStatusRequest()
+
+        # Act
+        await asyncio.sleep(0.05)
+        await pool.prune()
+        closed = net.connection is None
+        response = await net.sendStatusRequest()
+
+        # Assert
+        self.assertTrue(closed, "Idle connection not closed.")
+        self.assertTrue("CMD M119 Received" in response)
+        self.assertEqual(self.connections, 2)
+        await pool.close_all()
+
+    async def test_pruneDuringRequest_keptOpen(self):
+        # Arrange
+        async def handle(reader, writer):
+            while await reader.readuntil(b'\n'):
+                await asyncio.sleep(0.1)  # A slow printer.
+                writer.write(b'CMD M119 Received.\r\nLED: 0\r\nok\r\n')
+                await writer.drain()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        pool = ConnectionPool(idle_timeout=0.05)
+        net = pool.get('127.0.0.1', port)
+        await net.connect()
+        request = asyncio.ensure_future(net.sendStatusRequest())
+
+        # Act
+        await asyncio.sleep(0.07)
+        closed = await pool.prune()
+        response = await request
+
+        # Assert
+        self.assertEqual(closed, 0)
+        self.assertTrue(response.startswith("CMD M119 Received"))
+        await pool.close_all()
+        server.close()
+        await server.wait_closed()
+
+
+class TestLostConnection(unittest.IsolatedAsyncioTestCase):
+    """ Test a kept connection the printer drops mid batch."""
+
+    async def asyncSetUp(self):
+        self.received = []
+        self.connections = 0
+
+        async def handle(reader, writer):
+            self.connections += 1
+            first = self.connections == 1
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                self.received.append(line)
+                code = line[1:].split()[0]
+                writer.write(b'CMD ' + code + b' Received.\r\nok\r\n')
+                await writer.drain()
+                if first and code == b'M601':
+                    # Read the batch, answer only M601 and drop it.
+                    rest = await reader.readuntil(b'~M602\r\n')
+                    self.received.extend(rest.splitlines(keepends=True))
+                    break
+            writer.close()
+
+        self.server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.net = Network('127.0.0.1', port, keep_alive=True)
+        await self.net.sendStatusRequest()
+
+    async def asyncTearDown(self):
+        await self.net.disconnect()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_controlBatchLost_notSentAgain(self):
+        # Act
+        with self.assertRaises(ConnectionError):
+            await self.net.sendPrintRequest('My Box.gx')
+
+        # Assert
+        printed = [m for m in self.received if m.startswith(b'~M23')]
+        self.assertListEqual(printed, [b'~M23 0:/user/My Box.gx\r\n'])
+        self.assertEqual(self.connections, 1)
+
+    async def test_controlBatch_notQuery(self):
+        # Act
+        query = Network._isQuery(['~M119\r\n', '~M105\r\n'])
+        control = Network._isQuery(
+            ['~M601 S1\r\n', '~M24\r\n', '~M602\r\n'])
+
+        # Assert
+        self.assertTrue(query)
+        self.assertFalse(control)
+
+
+class TestPipelinedRequests(unittest.IsolatedAsyncioTestCase):
+    """ Test pipelined requests against a local tcp server."""
+
+    async def asyncSetUp(self):
+        self.reads = 0
+        replies = {
+            b'~M119\r\n': b'CMD M119 Received.\r\nLED: 0\r\nok\r\n',
+            b'~M105\r\n': b'CMD M105 Received.\r\nT0:22/0 B:14/0\r\nok\r\n',
+            b'~M27\r\n':
+                b'CMD M27 Received.\r\nSD printing byte 0/100\r\nok\r\n',
+        }
+
+        async def handle(reader, writer):
+            data = await reader.readuntil(b'~M27\r\n')
+            self.reads += 1
+            # Answer out of order to test the header matching.
+            for message in reversed(data.split(b'\n')):
+                if message:
+                    writer.write(replies[message + b'\n'])
+            await writer.drain()
+            writer.close()
+
+        self.server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_sendRequests_responsesInOrder(self):
+        # Arrange
+        net = Network('127.0.0.1', self.port)
+
+        # Act
+        status, temp, progress = await net.sendRequests(
+            ['~M119\r\n', '~M105\r\n', '~M27\r\n'])
+
+        # Assert
+        self.assertEqual(self.reads, 1)
+        self.assertTrue(status.startswith("CMD M119 Received"))
+        self.assertTrue(temp.startswith("CMD M105 Received"))
+        self.assertTrue(progress.startswith("CMD M27 Received"))
+
+
+class TestControlLease(unittest.IsolatedAsyncioTestCase):
+    """ Test the control lease against a local tcp server."""
+
+    async def asyncSetUp(self):
+        self.received = []
+        self.control = b'Control Success V2.1.'
+
+        async def handle(reader, writer):
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError:
+                    break
+                code = line[1:].split()[0]
+                self.received.append(code.decode())
+                body = self.control + b'\r\n' if code == b'M601' else b''
+                writer.write(
+                    b'CMD ' + code + b' Received.\r\n' + body + b'ok\r\n')
+                await writer.drain()
+            writer.close()
+
+        self.server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_controlLease_oneHandshake(self):
+        # Arrange
+        net = Network('127.0.0.1', self.port)
+
+        # Act
+        async with net.control():
+            self.assertTrue(net.hasControl)
+            led = await net.sendSetLedState(False)
+            temp = await net.sendSetTemperature(210)
+            pause = await net.sendPauseRequest()
+
+        # Assert
+        self.assertListEqual(
+            self.received, ['M601', 'M146', 'M104', 'M25', 'M602'])
+        self.assertTrue(led.startswith("CMD M146 Received"))
+        self.assertTrue(temp.startswith("CMD M104 Received"))
+        self.assertTrue(pause.startswith("CMD M25 Received"))
+        self.assertFalse(net.hasControl)
+        self.assertIsNone(net.connection)
+
+    async def test_controlFailed_exceptionControlError(self):
+        # Arrange
+        net = Network('127.0.0.1', self.port)
+        self.control = b'Control failed.'
+
+        # Act
+        with self.assertRaises(ControlError):
+            async with net.control():
+                pass
+        response = await net.sendPauseRequest()
+
+        # Assert
+        self.assertFalse(net.hasControl)
+        self.assertEqual(response, "")
+
+    async def test_controlLeaseTimeout_released(self):
+        # Arrange
+        net = Network('127.0.0.1', self.port)
+
+        # Act
+        async with net.control(timeout=0.01):
+            await asyncio.sleep(0.1)
+            self.assertFalse(net.hasControl)
+
+        # Assert
+        self.assertListEqual(self.received, ['M601', 'M602'])
+
+    async def test_controlLeaseTimeoutPrinterGone_logged(self):
+        # Arrange
+        net = Network('127.0.0.1', self.port)
+
+        # Act
+        async with net.control(timeout=0.05):
+            # The printer goes away.
+            self.server.close()
+            await self.server.wait_closed()
+            net._writer.close()
+            await asyncio.sleep(0.1)
+
+        # Assert
+        self.assertTrue(net._expiry.done())
+        self.assertIsNone(net._expiry.exception())
+        self.assertFalse(net.hasControl)
+
+
+class TestDeadlines(unittest.IsolatedAsyncioTestCase):
+    """ Test deadlines against a server that never answers."""
+
+    async def asyncSetUp(self):
+        self.clients = []
+
+        async def handle(reader, writer):
+            self.clients.append(writer)
+            await reader.read()  # Accept and hang.
+
+        self.server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        for writer in self.clients:
+            writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_commandTimeout_exceptionAndDisconnect(self):
+        # Arrange
+        net = Network('127.0.0.1', self.port, command_timeout=0.05)
+
+        # Act
+        with self.assertRaises(CommandTimeoutError):
+            await net.sendStatusRequest()
+
+        # Assert
+        self.assertIsNone(net.connection)
+
+    async def test_exchangeTimeout_isTimeoutError(self):
+        # Arrange
+        net = Network('127.0.0.1', self.port, keep_alive=True)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        # Act
+        with self.assertRaises(TimeoutError):
+            await net.sendRequests(['~M119\r\n', '~M105\r\n'], timeout=0.05)
+
+        # Assert
+        self.assertLess(loop.time() - start, 1)
+        self.assertIsNotNone(net.connection)  # Kept for resync.
+        self.assertListEqual(net._outstanding, ['M119', 'M105'])
+
+
+class TestResync(unittest.IsolatedAsyncioTestCase):
+    """ Test a kept connection after a late answer."""
+
+    async def asyncSetUp(self):
+        self.connections = 0
+
+        async def handle(reader, writer):
+            self.connections += 1
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                await asyncio.sleep(0.1)  # Slow printer.
+                code = line[1:].split()[0]
+                writer.write(b'CMD ' + code + b' Received.\r\nok\r\n')
+                await writer.drain()
+            writer.close()
+
+        self.server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.net = Network('127.0.0.1', self.port, keep_alive=True)
+
+    async def asyncTearDown(self):
+        await self.net.disconnect()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_afterTimeout_staleResponseDropped(self):
+        # Arrange
+        with self.assertRaises(TimeoutError):
+            await self.net.sendRequests(['~M119\r\n'], timeout=0.05)
+
+        # Act
+        response = await self.net.sendTempRequest()
+
+        # Assert
+        self.assertTrue(response.startswith("CMD M105 Received"))
+        self.assertEqual(self.connections, 1)
+        self.assertListEqual(self.net._outstanding, [])
+
+    async def test_afterCancel_staleResponseDropped(self):
+        # Arrange
+        task = asyncio.ensure_future(self.net.sendStatusRequest())
+        await asyncio.sleep(0.02)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        # Act
+        response = await self.net.sendProgressRequest()
+
+        # Assert
+        self.assertTrue(response.startswith("CMD M27 Received"))
+        self.assertEqual(self.connections, 1)
+
+
+class TestConcurrentRequests(unittest.IsolatedAsyncioTestCase):
+    """ Test many coroutines sharing one network."""
+
+    async def asyncSetUp(self):
+        self.emulator = await PrinterEmulator().start('127.0.0.1', 0)
+        self.net = Network(
+            '127.0.0.1', self.emulator.port, keep_alive=True)
+
+    async def asyncTearDown(self):
+        await self.net.disconnect()
+        await self.emulator.close()
+
+    async def test_concurrentRequests_ownResponses(self):
+        # Arrange
+        calls = [
+            (self.net.sendStatusRequest, "M119"),
+            (self.net.sendTempRequest, "M105"),
+            (self.net.sendProgressRequest, "M27"),
+            (self.net.sendInfoRequest, "M115"),
+        ] * 5
+
+        # Act
+        responses = await asyncio.gather(
+            *[send() for send, _ in calls],
+            self.net.sendRequests(['~M27\r\n', '~M119\r\n']))
+
+        # Assert
+        for response, (_, command) in zip(responses, calls):
+            self.assertTrue(
+                response.startswith(f"CMD {command} Received"), response)
+        progress, status = responses[-1]
+        self.assertTrue(progress.startswith("CMD M27 Received"))
+        self.assertTrue(status.startswith("CMD M119 Received"))
+        self.assertEqual(self.emulator.connections, 1)
+
+    async def test_cancelWaitingRequest_othersServed(self):
+        # Arrange
+        first = asyncio.ensure_future(self.net.sendStatusRequest())
+        waiting = asyncio.ensure_future(self.net.sendTempRequest())
+        last = asyncio.ensure_future(self.net.sendProgressRequest())
+        await asyncio.sleep(0)
+
+        # Act
+        waiting.cancel()
+        status, progress = await asyncio.gather(first, last)
+
+        # Assert
+        self.assertTrue(waiting.cancelled())
+        self.assertTrue(status.startswith("CMD M119 Received"))
+        self.assertTrue(progress.startswith("CMD M27 Received"))
+        self.assertFalse(self.net._busy)
+
+
+class TestCircuitBreaker(unittest.IsolatedAsyncioTestCase):
+
+    def test_failuresInRow_open(self):
+        # Arrange
+        breaker = CircuitBreaker(threshold=2, base=60)
+
+        # Act
+        breaker.failure()
+        closed = breaker.state
+        breaker.failure()
+
+        # Assert
+        self.assertEqual(closed, CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertGreater(breaker.retry_in, 40)
+
+    async def test_halfOpenFailure_longerBackoff(self):
+        # Arrange
+        breaker = CircuitBreaker(threshold=1, base=0.05, jitter=0)
+        breaker.failure()
+        await asyncio.sleep(0.06)
+
+        # Act
+        allowed = breaker.allow()
+        second = breaker.allow()
+        breaker.failure()
+
+        # Assert
+        self.assertTrue(allowed)
+        self.assertFalse(second)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertGreater(breaker.retry_in, 0.07)
+
+    async def test_deadPrinter_failFastThenRecover(self):
+        # Arrange
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        net = Network(
+            '127.0.0.1', port,
+            breaker=CircuitBreaker(threshold=2, base=0.1, jitter=0))
+        for _ in range(2):
+            with self.assertRaises(TimeoutError):
+                await net.sendStatusRequest()
+
+        # Act
+        with self.assertRaises(CircuitOpenError):
+            await net.sendStatusRequest()
+        await asyncio.sleep(0.15)
+
+        async def handle(reader, writer):
+            await reader.readuntil(b'\n')
+            writer.write(b'CMD M119 Received.\r\nLED: 0\r\nok\r\n')
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', port)
+        try:
+            response = await net.sendStatusRequest()
+        finally:
+            server.close()
+            await server.wait_closed()
+
+        # Assert
+        self.assertTrue(response.startswith("CMD M119 Received"))
+        self.assertEqual(net.breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_reconnectFails_countedOnce(self):
+        # Arrange
+        net, server = await self.lostConnection()
+
+        # Act
+        server.close()
+        await server.wait_closed()
+        with self.assertRaises(TimeoutError):
+            await net.sendStatusRequest()
+
+        # Assert
+        self.assertEqual(net.breaker.failures, 1)
+
+    async def test_reconnectCircuitOpen_notCounted(self):
+        # Arrange
+        net, server = await self.lostConnection()
+        net.breaker = CircuitBreaker(threshold=1, base=60)
+        lost = net._exchange.side_effect
+
+        def otherFailure(*args):
+            net.breaker.failure()  # Another request opens the circuit.
+            raise lost
+
+        net._exchange.side_effect = otherFailure
+
+        # Act
+        with self.assertRaises(CircuitOpenError):
+            await net.sendStatusRequest()
+        server.close()
+        await server.wait_closed()
+
+        # Assert
+        self.assertEqual(net.breaker.failures, 1)
+
+    async def lostConnection(self):
+        # A kept connection that fails the next exchange.
+        async def handle(reader, writer):
+            while await reader.readuntil(b'\n'):
+                writer.write(b'CMD M119 Received.\r\nLED: 0\r\nok\r\n')
+                await writer.drain()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        net = Network('127.0.0.1', port, keep_alive=True)
+        await net.sendStatusRequest()
+        net._exchange = mock.AsyncMock(side_effect=ConnectionResetError())
+        self.addAsyncCleanup(net.disconnect)
+        return net, server
+
+
 class TestNetworkCommunicateWithPrinter(unittest.IsolatedAsyncioTestCase):
     """ Class to test the communication with a real Flashforge printer."""
 
@@ -1,8 +1,13 @@
+import asyncio
+import os
+import tempfile
 import unittest
 from unittest import mock
 
+from src.ffpp.Cache import MachineInfoCache
+from src.ffpp.Discovery import DiscoveredPrinter
 from src.ffpp.Printer import ConnectionStatus
-from src.ffpp.Printer import Printer
+from src.ffpp.Printer import Printer, UpdateGroup
 from tests.const_NetworkResponse import (
     RESPONSE_sendAbortRequest,
     RESPONSE_sendContinueRequest,
@@ -38,6 +43,7 @@ class test_PrinterClass(unittest.IsolatedAsyncioTestCase):
         )
         self.mock_net = self.patch_net.start()
         self.mock_net().connect.return_value = True
+        self.mock_net().isAlive.return_value = False
         self.mock_net().sendMessage.return_value = True
         self.setResponse()
         self.printer = Printer(PRINTER_IP)
@@ -88,6 +94,24 @@ class test_PrinterClass(unittest.IsolatedAsyncioTestCase):
         self.mock_net().sendAbortRequest. \
             return_value = RESPONSE_sendAbortRequest
 
+        self.mock_net().sendRequests.side_effect = self.sendRequests
+        self.sent = []
+
+    def sendRequests(
+        self, messages, disconnect=True, decode=True, timeout=None
+    ):
+        # Answer a pipelined batch with the single request responses.
+        net = self.mock_net()
+        self.sent.extend(messages)
+        responses = {
+            '~M119\r\n': net.sendStatusRequest,
+            '~M105\r\n': net.sendTempRequest,
+            '~M27\r\n': net.sendProgressRequest,
+            '~M114\r\n': net.sendPositionRequest,
+            '~M115\r\n': net.sendInfoRequest,
+        }
+        return [responses[msg].return_value for msg in messages]
+
     # @mock.patch.object(Network, "connect", mock.AsyncMock(return_value=True))
     async def test_ConnectionToPrinter_Connected(self):
         # Arrange
@@ -127,6 +151,25 @@ class test_PrinterClass(unittest.IsolatedAsyncioTestCase):
             f"{self.printer.connected}"
         )
 
+    async def test_connectWithTimeout_machineInfoDeadline(self):
+        # Arrange
+        printer = Printer(PRINTER_IP, timeout=5)
+
+        # Act
+        await printer.connect()
+
+        # Assert
+        for call in self.mock_net().sendRequests.call_args_list:
+            self.assertEqual(call.kwargs["timeout"], 5)
+        self.assertIn('~M115\r\n', self.sent)
+
+    async def test_timeout_controlDeadline(self):
+        # Act
+        Printer(PRINTER_IP, timeout=5)
+
+        # Assert
+        self.mock_net.assert_called_with(PRINTER_IP, 8899, exchange_timeout=5)
+
     async def test_updateTimeoutToPrinter_Exception(self):
         # Arrange
         self.mock_net().connect.side_effect = TimeoutError
@@ -232,12 +275,15 @@ class test_PrinterClass(unittest.IsolatedAsyncioTestCase):
         # Act
         await self.printer.update()
         extruder = self.printer.extruder_tools.get()
+        extruder2 = self.printer.extruder_tools.get(1)
         bed = self.printer.bed_tools.get()
 
         # Assert
-        self.assertTrue(len(self.printer.extruder_tools) == 1)
+        self.assertTrue(len(self.printer.extruder_tools) == 2)
         self.assertTrue(extruder.now == 104.5)
         self.assertTrue(extruder.target == 225.0)
+        self.assertTrue(extruder2.name == "t1")
+        self.assertTrue(extruder2.now == 0.0)
         self.assertTrue(len(self.printer.bed_tools) == 1)
         self.assertTrue(bed.now == 51.3)
         self.assertTrue(bed.target == 50.0)
@@ -258,6 +304,218 @@ class test_PrinterClass(unittest.IsolatedAsyncioTestCase):
         self.assertTrue(bed.now == 14)
         self.assertTrue(bed.target == 0)
 
+    async def test_updateTwice_toolsUpdatedInPlace(self):
+        # Arrage
+        await self.printer.update()
+        extruder = self.printer.extruder_tools.get()
+        bed = self.printer.bed_tools.get()
+        self.mock_net().sendTempRequest. \
+            return_value = RESPONSE_sendTempRequest2
+
+        # Act
+        await self.printer.update()
+
+        # Assert
+        self.assertIs(self.printer.extruder_tools.get("t0"), extruder)
+        self.assertIs(self.printer.bed_tools.get(), bed)
+        self.assertTrue(extruder.now == 104.5)
+        self.assertTrue(bed.target == 50.0)
+
+    async def test_updateWithHistory_recordsSamples(self):
+        # Arrange
+        printer = Printer(PRINTER_IP, history=10)
+        self.mock_net().sendProgressRequest. \
+            return_value = RESPONSE_sendProgressRequest2
+
+        # Act
+        await printer.connect()  # First update.
+        await printer.update()
+
+        # Assert
+        self.assertIsNone(self.printer.history)
+        self.assertEqual(len(printer.history), 2)
+        latest = printer.history.latest()
+        self.assertEqual(latest['extruder'], 22)
+        self.assertEqual(latest['bed'], 14)
+        self.assertEqual(latest['percent'], 11)
+        self.assertEqual(latest['layer'], 44)
+
+    async def test_watch_yieldsChanges(self):
+        # Arrange
+        await self.printer.connect()
+        watch = self.printer.watch(deadband=1)
+        self.mock_net().sendStatusRequest. \
+            return_value = RESPONSE_sendStatusRequest2
+        self.mock_net().sendTempRequest. \
+            return_value = RESPONSE_sendTempRequest2
+
+        # Act
+        first = asyncio.ensure_future(watch.__anext__())
+        await asyncio.sleep(0)
+        await self.printer.update()
+        changes = [await first]
+        while len(self.printer._subscriptions[0]):
+            changes.append(await watch.__anext__())
+        await watch.aclose()
+
+        # Assert
+        names = {change.name for change in changes}
+        self.assertIn("machine_status", names)
+        self.assertIn("temperature.t0", names)
+        self.assertIn("temperature.t1", names)
+        self.assertNotIn("status", names)
+        self.assertListEqual(self.printer._subscriptions, [])
+
+    async def test_connectWithIdentity_skipMachineInfo(self):
+        # Arrange
+        identity = DiscoveredPrinter(
+            "Adventurer4", PRINTER_IP, serial="SNADVA9501174")
+        printer = Printer(PRINTER_IP, identity=identity)
+
+        # Act
+        await printer.connect()
+
+        # Assert
+        self.assertNotIn('~M115\r\n', self.sent)
+        self.assertEqual(printer.machine_name, "Adventurer4")
+        self.assertEqual(printer.serial, "SNADVA9501174")
+        self.assertEqual(printer.machine_status, "READY")
+
+    async def test_connectWithIdentity_refreshMachineInfoOnUpdate(self):
+        # Arrange
+        identity = DiscoveredPrinter(
+            "Adventurer4", PRINTER_IP, serial="SNADVA9501174")
+        printer = Printer(PRINTER_IP, identity=identity)
+        await printer.connect()
+
+        # Act
+        await printer.update()
+
+        # Assert
+        self.assertIn('~M115\r\n', self.sent)
+        self.assertEqual(printer.firmware, "v2.0.9")
+        self.assertEqual(printer.mac_address, "88:A9:A7:93:86:F8")
+        self.assertFalse(printer._infoStale)
+
+    async def test_identityPort_used(self):
+        # Arrange
+        identity = DiscoveredPrinter(
+            "Adventurer4", PRINTER_IP, serial="SNADVA9501174", port=8900)
+
+        # Act
+        Printer(PRINTER_IP, identity=identity)
+        Printer(PRINTER_IP, 8899, identity=identity)
+
+        # Assert
+        calls = self.mock_net.call_args_list[-2:]
+        self.assertEqual(calls, [
+            mock.call(PRINTER_IP, 8900, exchange_timeout=None),
+            mock.call(PRINTER_IP, 8899, exchange_timeout=None)])
+
+    async def test_connectWithCache_skipThenRefreshMachineInfo(self):
+        # Arrange
+        self.mock_net().ip = PRINTER_IP
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "machines.json")
+            cache = MachineInfoCache(path)
+            await Printer(PRINTER_IP, cache=cache).connect()
+            cache.flush()
+            printer = Printer(PRINTER_IP, cache=MachineInfoCache(path))
+            self.sent.clear()
+
+            # Act
+            await printer.connect()
+            connected = printer.machine_type
+            sentAtConnect = list(self.sent)
+            await printer.update()
+
+            # Assert
+            self.assertNotIn('~M115\r\n', sentAtConnect)
+            self.assertEqual(connected, "Flashforge Adventurer 4")
+            self.assertEqual(printer.mac_address, "88:A9:A7:93:86:F8")
+            sent = self.mock_net().sendRequests.call_args[0][0]
+            self.assertIn('~M115\r\n', sent)
+            self.assertFalse(printer._infoStale)
+
+    async def test_updateTemperatureGroup_onlyM105(self):
+        # Arrange
+        await self.printer.connect()
+        self.mock_net().sendTempRequest. \
+            return_value = RESPONSE_sendTempRequest2
+
+        # Act
+        await self.printer.update(groups=UpdateGroup.TEMPERATURE)
+
+        # Assert
+        sent = self.mock_net().sendRequests.call_args[0][0]
+        self.assertListEqual(sent, ['~M105\r\n'])
+        self.assertEqual(self.printer.extruder_tools.get().now, 104.5)
+        self.assertIsNone(self.printer.position[0])
+
+    async def test_updatePositionGroup_position(self):
+        # Arrange
+        await self.printer.connect()
+
+        # Act
+        await self.printer.update(groups=UpdateGroup.ALL)
+
+        # Assert
+        sent = self.mock_net().sendRequests.call_args[0][0]
+        self.assertEqual(len(sent), 4)
+        self.assertTupleEqual(
+            self.printer.position, ("19.3861", "54.3", "194.44"))
+
+    async def test_concurrentUpdates_oneExchange(self):
+        # Arrange
+        await self.printer.connect()
+        self.mock_net().sendRequests.reset_mock()
+
+        # Act
+        await asyncio.gather(
+            self.printer.update(),
+            self.printer.update(),
+            self.printer.update(groups=UpdateGroup.TEMPERATURE))
+
+        # Assert
+        self.mock_net().sendRequests.assert_awaited_once()
+
+    async def test_cancelledUpdate_nextCallerNotCancelled(self):
+        # Arrange
+        await self.printer.connect()
+
+        async def slow(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return self.sendRequests(*args, **kwargs)
+
+        self.mock_net().sendRequests.side_effect = slow
+        first = asyncio.ensure_future(self.printer.update())
+        await asyncio.sleep(0)
+
+        # Act
+        first.cancel()
+        await asyncio.sleep(0)
+        await self.printer.update()
+
+        # Assert
+        self.assertTrue(first.cancelled())
+        self.assertEqual(self.printer.machine_status, "READY")
+        self.assertDictEqual(self.printer._flights, {})
+
+    async def test_updateMaxAge_cachedValues(self):
+        # Arrange
+        self.assertIsNone(self.printer.dataAge())
+        await self.printer.connect()
+        self.mock_net().sendRequests.reset_mock()
+
+        # Act
+        await self.printer.update(max_age=60)
+        await self.printer.update(groups=UpdateGroup.ALL, max_age=60)
+
+        # Assert
+        self.mock_net().sendRequests.assert_awaited_once()
+        self.assertLess(self.printer.dataAge(), 1)
+        self.assertLess(self.printer.dataAge(UpdateGroup.POSITION), 1)
+
     async def test_toolHandlerAddsameName_CorrectCount(self):
         # Arrange
         from src.ffpp.Printer import ToolHandler, temperatures
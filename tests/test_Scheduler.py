@@ -0,0 +1,145 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from src.ffpp.Fleet import Fleet
+from src.ffpp.Printer import ToolHandler, temperatures
+from src.ffpp.Scheduler import PollScheduler
+
+
+def mockPrinter(ip, status="READY", move="READY", percent="0", temp=(20, 0)):
+    printer = mock.Mock()
+    printer.network.ip = ip
+    printer.update = mock.AsyncMock()
+    printer.machine_status = status
+    printer.move_mode = move
+    printer.print_percent = percent
+    printer.extruder_tools = ToolHandler()
+    printer.extruder_tools.add(temperatures("T0", *temp))
+    printer.bed_tools = ToolHandler()
+    return printer
+
+
+class test_PollScheduler(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.scheduler = PollScheduler(
+            Fleet(), heating=1, printing=5, finishing=2, idle=60)
+
+    def test_heatingPrinter_heatingInterval(self):
+        # Arrange
+        printer = mockPrinter("10.0.0.1", temp=(100, 210))
+
+        # Act
+        interval = self.scheduler.nextInterval(printer)
+
+        # Assert
+        self.assertEqual(interval, 1)
+
+    def test_printingPrinter_printingInterval(self):
+        # Arrange
+        printer = mockPrinter(
+            "10.0.0.1", "BUILDING_FROM_SD", "MOVING", "40", (210, 210))
+
+        # Act
+        printing = self.scheduler.nextInterval(printer)
+        printer.print_percent = "97"
+        finishing = self.scheduler.nextInterval(printer)
+
+        # Assert
+        self.assertEqual(printing, 5)
+        self.assertEqual(finishing, 2)
+
+    def test_idlePrinter_backOff(self):
+        # Arrange
+        printer = mockPrinter("10.0.0.1")
+
+        # Act
+        intervals = [
+            self.scheduler.nextInterval(printer) for _ in range(6)]
+        # Heating up again polls fast at once.
+        printer.extruder_tools.add(temperatures("T0", 20, 210))
+        heating = self.scheduler.nextInterval(printer)
+
+        # Assert
+        self.assertListEqual(intervals, [5, 10, 20, 40, 60, 60])
+        self.assertEqual(heating, 1)
+
+    def test_coolingPrinter_heatingInterval(self):
+        # Arrange
+        printer = mockPrinter("10.0.0.1", temp=(200, 0))
+        self.scheduler.nextInterval(printer)
+
+        # Act
+        printer.extruder_tools.add(temperatures("T0", 150, 0))
+        interval = self.scheduler.nextInterval(printer)
+
+        # Assert
+        self.assertEqual(interval, 1)
+
+    def test_schedule_jitterWithinBounds(self):
+        # Arrange
+        printer = mockPrinter("10.0.0.1")
+        delays = []
+
+        # Act
+        for _ in range(20):
+            self.scheduler.schedule(printer, 10)
+            delays.append(self.scheduler.due("10.0.0.1") - time.monotonic())
+
+        # Assert
+        for delay in delays:
+            self.assertTrue(8.9 <= delay <= 11.1, delay)
+
+    async def test_run_pollsPrinters(self):
+        # Arrange
+        printer = mockPrinter("10.0.0.1", temp=(100, 210))
+        scheduler = PollScheduler(
+            Fleet([printer]), heating=0.01, printing=0.01)
+
+        # Act
+        task = asyncio.ensure_future(scheduler.run())
+        await asyncio.sleep(0.2)
+        task.cancel()
+
+        # Assert
+        self.assertGreater(printer.update.await_count, 3)
+
+    async def test_run_removedPrinterAddedBack_polled(self):
+        # Arrange
+        printer = mockPrinter("10.0.0.1", temp=(100, 210))
+        fleet = Fleet([printer])
+        scheduler = PollScheduler(
+            fleet, heating=0.01, printing=0.01, idle=0.02)
+        task = asyncio.ensure_future(scheduler.run())
+        await asyncio.sleep(0.05)
+
+        # Act
+        fleet.remove("10.0.0.1")
+        await asyncio.sleep(0.05)
+        printer.update.reset_mock()
+        fleet.add(printer)
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+        # Assert
+        self.assertGreater(printer.update.await_count, 0)
+
+    async def test_run_printerAddedToEmptyFleet_polledAtOnce(self):
+        # Arrange
+        fleet = Fleet()
+        scheduler = PollScheduler(fleet, printing=0.01, idle=60)
+        task = asyncio.ensure_future(scheduler.run())
+        await asyncio.sleep(0.01)
+        printer = mockPrinter("10.0.0.1")
+
+        # Act
+        fleet.add(printer)
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        # Assert
+        printer.update.assert_awaited()
+        self.assertListEqual(fleet.added_listeners, [])
@@ -0,0 +1,72 @@
+import asyncio
+import unittest
+
+from src.ffpp.Watch import COALESCE, DROP_OLDEST, Subscription
+
+
+class test_Subscription(unittest.IsolatedAsyncioTestCase):
+
+    async def test_offer_onlyRealChanges(self):
+        # Arrange
+        sub = Subscription(deadband=2)
+        sub.baseline("p", {"machine_status": "READY", "temperature.t0": 20})
+
+        # Act
+        sub.offer("p", {"machine_status": "READY", "temperature.t0": 21})
+        sub.offer("p", {"machine_status": "BUILDING_FROM_SD",
+                        "temperature.t0": 22.5})
+
+        # Assert
+        self.assertEqual(len(sub), 2)
+        status = await sub.get()
+        temp = await sub.get()
+        self.assertEqual(
+            (status.name, status.old, status.new),
+            ("machine_status", "READY", "BUILDING_FROM_SD"))
+        self.assertEqual((temp.old, temp.new), (20, 22.5))
+
+    async def test_coalesce_netChange(self):
+        # Arrange
+        sub = Subscription(policy=COALESCE)
+        sub.baseline("p", {"print_percent": "1", "led": "0"})
+
+        # Act
+        sub.offer("p", {"print_percent": "2", "led": "1"})
+        sub.offer("p", {"print_percent": "3", "led": "0"})
+
+        # Assert
+        self.assertEqual(len(sub), 1)
+        change = await sub.get()
+        self.assertEqual((change.old, change.new), ("1", "3"))
+
+    async def test_dropOldest_bounded(self):
+        # Arrange
+        sub = Subscription(maxsize=2, policy=DROP_OLDEST)
+
+        # Act
+        for i in range(5):
+            sub.offer("p", {"print_layer": str(i)})
+
+        # Assert
+        self.assertEqual(len(sub), 2)
+        self.assertEqual(sub.dropped, 3)
+        self.assertEqual((await sub.get()).new, "3")
+
+    async def test_close_endsIteration(self):
+        # Arrange
+        sub = Subscription()
+        changes = []
+
+        async def consume():
+            async for change in sub:
+                changes.append(change)
+
+        # Act
+        task = asyncio.ensure_future(consume())
+        sub.offer("p", {"led": "1"})
+        await asyncio.sleep(0)
+        sub.close()
+        await asyncio.wait_for(task, 1)
+
+        # Assert
+        self.assertEqual(len(changes), 1)